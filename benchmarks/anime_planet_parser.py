@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compares the Anime-Planet HTML parsing backends on saved manga pages.
+
+Every backend must produce the same ParserResult as the "bs4-full" reference (the original
+full-tree BeautifulSoup parse); any mismatch is reported and makes the script exit non-zero.
+
+Usage: python benchmarks/anime_planet_parser.py [--runs N] [page.html ...]
+
+Without pages, the saved pages in tests/fixtures/anime_planet are used.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.providers.anime_planet.backends import backends
+from src.providers.anime_planet.parser import parse_page
+
+root = Path(__file__).resolve().parent.parent
+
+reference_backend = "bs4-full"
+
+parser = argparse.ArgumentParser("anime-planet-parser-benchmark")
+parser.add_argument("--runs", type=int, default=20, help="Parses per page per backend.")
+parser.add_argument("pages", nargs="*", type=Path, help="Saved Anime-Planet pages.")
+
+
+def main():
+    args = parser.parse_args()
+    paths = args.pages or sorted((root / "tests/fixtures/anime_planet").glob("*.html"))
+    pages = {path: path.read_text(encoding="utf-8") for path in paths}
+    mismatches = 0
+    for path, html in pages.items():
+        expected = parse_page(html, backend=reference_backend)
+        for backend in backends:
+            if (actual := parse_page(html, backend=backend)) != expected:
+                mismatches += 1
+                print(f"MISMATCH {backend} on {path}:\n  {actual}\n  {expected}")
+    total_bytes = sum(len(html.encode("utf-8")) for html in pages.values())
+    for backend in backends:
+        start = time.process_time()
+        for _ in range(args.runs):
+            for html in pages.values():
+                parse_page(html, backend=backend)
+        elapsed = time.process_time() - start
+        parses = args.runs * len(pages)
+        print(
+            f"{backend:<10} {elapsed / parses * 1000:8.2f} ms CPU/page"
+            f"   {parses / elapsed:8.1f} pages/s"
+            f"   {total_bytes * args.runs / elapsed / 1_000_000:8.1f} MB/s"
+        )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Measures what building an item's output allocates, with claims copied from templates and built from scratch.
+
+Every item gets a result shaped like the providers' (genres, a demographic, dates, volumes, country and
+language, a provider ID and links), which is simplified and referenced the way run_item does it. The
+outputs are kept alive until the end, like the bot keeps them until the edit, and what is still
+allocated afterwards is reported per item: memory blocks (sys.getallocatedblocks) and traced bytes.
+Each mode is warmed up first, so property types are looked up outside the measurement.
+
+Looking up property types needs access to Wikidata.
+
+Usage: python benchmarks/claim_allocations.py [--items N] [--runs N]
+"""
+
+import argparse
+import datetime
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from wikidata_bot_framework import ExtraProperty, ExtraReference
+
+from src import templates
+from src.constants import (
+    Demographics,
+    Genres,
+    country_prop,
+    japan_item,
+    japanese_lang_item,
+    language_prop,
+    md_id_prop,
+    md_item,
+    stated_at_prop,
+    url_prop,
+)
+from src.data.link import Link
+from src.data.results import Result
+
+parser = argparse.ArgumentParser("claim-allocations-benchmark")
+parser.add_argument("--items", type=int, default=2000, help="Items per pass.")
+parser.add_argument("--runs", type=int, default=5, help="Timed passes per mode.")
+
+genres = list(Genres)
+demographics = list(Demographics)
+
+
+def build_output(index: int) -> list[ExtraProperty]:
+    result = Result()
+    result.genres.extend(genres[(index + offset) % len(genres)] for offset in (0, 3, 7))
+    result.demographics.append(demographics[index % len(demographics)])
+    result.start_date = datetime.datetime(1990 + index % 30, 1 + index % 12, 1)
+    if index % 2:
+        result.end_date = datetime.datetime(2000 + index % 20, 1 + index % 12, 1)
+    result.volumes = 1 + index % 40
+    result.add_value(country_prop, japan_item, skip_if_conflicting_exists=True)
+    result.add_value(language_prop, japanese_lang_item)
+    result.add_value(md_id_prop, f"{index:08x}-0000-0000-0000-000000000000")
+    result.links.append(Link(f"https://example.com/manga/{index}"))
+    result.links.append(
+        Link(f"https://example.jp/manga/{index}", language=japanese_lang_item)
+    )
+    result.simplify()
+    provider_id = f"{index:08x}"
+    output = []
+    for extra_properties in result.other_properties.values():
+        for extra_property in extra_properties:
+            # The same claims as MangaImportBot.make_reference.
+            reference = ExtraReference()
+            reference.add_claim(
+                templates.make_claim(stated_at_prop, md_item, is_reference=True)
+            )
+            reference.add_claim(
+                templates.make_claim(
+                    url_prop,
+                    f"https://mangadex.org/title/{provider_id}",
+                    is_reference=True,
+                )
+            )
+            reference.add_claim(
+                templates.make_claim(md_id_prop, provider_id, is_reference=True)
+            )
+            extra_property.add_reference(reference)
+            output.append(extra_property)
+    return output
+
+
+def main():
+    args = parser.parse_args()
+    for enabled in (False, True):
+        templates.enabled = enabled
+        label = "templates" if enabled else "from scratch"
+        for index in range(args.items):
+            build_output(index)
+        start = time.process_time()
+        for _ in range(args.runs):
+            for index in range(args.items):
+                build_output(index)
+        elapsed = time.process_time() - start
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        outputs = [build_output(index) for index in range(args.items)]
+        gc.collect()
+        blocks = sys.getallocatedblocks() - blocks_before
+        claims = sum(len(output) for output in outputs)
+        del outputs
+        gc.collect()
+        tracemalloc.start()
+        outputs = [build_output(index) for index in range(args.items)]
+        kept, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del outputs
+        print(
+            f"{label:<13} {elapsed / (args.runs * args.items) * 1000:8.3f} ms CPU/item"
+            f"   {blocks / args.items:8.1f} blocks/item"
+            f"   {kept / args.items / 1024:8.2f} KiB/item"
+            f"   {claims / args.items:5.1f} claims/item"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measures how long it takes to start the bot.
+
+Every target is run in a fresh interpreter (so nothing is cached in-process) and the best
+and median wall times over a number of runs are reported.
+
+Usage: python benchmarks/import_time.py [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+
+targets: dict[str, list[str]] = {
+    "run.py --help": [sys.executable, "run.py", "--help"],
+    "import src.constants": [sys.executable, "-c", "import src.constants"],
+    "import src.providers": [sys.executable, "-c", "import src.providers"],
+    "import src.main": [sys.executable, "-c", "import src.main"],
+}
+
+parser = argparse.ArgumentParser("import-time-benchmark")
+parser.add_argument("--runs", type=int, default=10, help="Runs per target.")
+
+
+def time_command(command: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        command,
+        cwd=repo_root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    args = parser.parse_args()
+    for name, command in targets.items():
+        try:
+            timings = [time_command(command) for _ in range(args.runs)]
+        except subprocess.CalledProcessError:
+            print(f"{name:<24} failed (is the environment set up?)")
+            continue
+        print(
+            f"{name:<24} best {min(timings) * 1000:8.1f} ms"
+            f"   median {statistics.median(timings) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Compares the JSON decoders, with and without field projection, on saved API responses.
+
+Every decoder must produce the same document as the standard library; any mismatch is reported
+and makes the script exit non-zero. Memory is measured with tracemalloc in a separate pass, since
+tracing slows decoding down: "peak" is the most allocated while decoding one file, "kept" what the
+decoded document still holds afterwards.
+
+Usage: python benchmarks/json_decode.py [--runs N] [--fields data.a,data.b] response.json [...]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.json_decoder import decoders, loads
+
+reference_decoder = "json"
+
+parser = argparse.ArgumentParser("json-decode-benchmark")
+parser.add_argument("--runs", type=int, default=50, help="Decodes per file per mode.")
+parser.add_argument(
+    "--fields",
+    type=lambda value: tuple(value.split(",")),
+    help="Comma-separated dotted field paths to also benchmark projected decoding with, "
+    "e.g. the json_fields of a provider.",
+)
+parser.add_argument("payloads", nargs="+", type=Path, help="Saved JSON responses.")
+
+
+def available_decoders() -> list[str]:
+    available = []
+    for name, decode in decoders.items():
+        try:
+            decode(b"{}")
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def main():
+    args = parser.parse_args()
+    payloads = {path: path.read_bytes() for path in args.payloads}
+    modes = [(name, None) for name in available_decoders()]
+    if args.fields:
+        modes += [(name, args.fields) for name, _ in modes]
+    mismatches = 0
+    for path, content in payloads.items():
+        for fields in {fields for _, fields in modes}:
+            expected = loads(content, fields, decoder=reference_decoder)
+            for name, mode_fields in modes:
+                if mode_fields == fields and loads(content, fields, name) != expected:
+                    mismatches += 1
+                    print(f"MISMATCH {name} (fields={fields}) on {path}")
+    total_bytes = sum(len(content) for content in payloads.values())
+    for name, fields in modes:
+        label = f"{name}{'+fields' if fields else ''}"
+        start = time.process_time()
+        for _ in range(args.runs):
+            for content in payloads.values():
+                loads(content, fields, name)
+        elapsed = time.process_time() - start
+        decodes = args.runs * len(payloads)
+        peak = kept = 0
+        for content in payloads.values():
+            tracemalloc.start()
+            # Kept alive until memory is read, like a provider holding on to its response.
+            document = loads(content, fields, name)
+            current, file_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del document
+            peak = max(peak, file_peak)
+            kept = max(kept, current)
+        print(
+            f"{label:<14} {elapsed / decodes * 1000:8.3f} ms CPU/file"
+            f"   {total_bytes * args.runs / elapsed / 1_000_000:8.1f} MB/s"
+            f"   {peak / 1024:10.1f} KiB peak"
+            f"   {kept / 1024:10.1f} KiB kept"
+        )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
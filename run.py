@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 import argparse
-from typing import Union
+import atexit
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
 
-import pywikibot
-from pywikibot.pagegenerators import WikidataSPARQLPageGenerator
-from wikidata_bot_framework import get_random_hex
+from src.constants import automated_scan_properties
 
-from src.constants import automated_scan_properties, session, site
-from src.copy_labels import copy_labels
-from src.main import MangaImportBot
+if TYPE_CHECKING:
+    import pywikibot
+
+    from src.main import MangaImportBot
 
 parser = argparse.ArgumentParser("wikidata-manga-import")
 parser.add_argument(
@@ -22,13 +23,143 @@ parser.add_argument(
 )
 parser.add_argument("-i", "--item", type=str, help="The item to import data for.")
 parser.add_argument("--copy-from", type=str, help="The item to copy labels from.")
+parser.add_argument(
+    "--parse-workers",
+    type=int,
+    default=0,
+    help="The number of processes to parse large HTML/JSON responses in. 0 parses in-process.",
+)
+parser.add_argument(
+    "--daemon",
+    action="store_true",
+    help="Keeps running and processes items from the work queue as they are added.",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="The number of items the daemon or --plan-output processes at once.",
+)
+parser.add_argument(
+    "--enqueue",
+    action="store_true",
+    help="Adds the item or the items in the input file to the work queue instead of processing them.",
+)
+parser.add_argument(
+    "--priority",
+    type=int,
+    default=0,
+    help="The priority of enqueued items. Higher priorities are processed first.",
+)
+parser.add_argument(
+    "--queue",
+    type=str,
+    help="The work queue database. Defaults to work_queue.sqlite3 in the state directory.",
+)
+
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="Only processes the items whose titles changed on a provider since the last incremental run.",
+)
+parser.add_argument(
+    "--time-budget",
+    type=float,
+    help="Stops starting new items after this many seconds. In automatic mode the items most worth "
+    "processing (stale, often edited, with many provider IDs) are done first.",
+)
+parser.add_argument(
+    "--plan-output",
+    type=str,
+    help="Writes the edits for the items to this file instead of making them, to be made later with --apply-plan.",
+)
+parser.add_argument(
+    "--apply-plan",
+    type=str,
+    help="Makes the edits in a file written by --plan-output.",
+)
+
+
+def read_item_file(path: str) -> Iterator[str]:
+    with open(path, "r") as f:
+        for line in f:
+            if line := line.strip():
+                yield line
+
+
+def process_items(
+    bot: "MangaImportBot",
+    items: Iterable["pywikibot.ItemPage"],
+    args: argparse.Namespace,
+    skip_errored_items: bool = False,
+) -> bool:
+    """Processes (or plans) the items.
+
+    Args:
+        bot (MangaImportBot): The bot.
+        items (Iterable[pywikibot.ItemPage]): The items.
+        args (argparse.Namespace): The command line arguments.
+        skip_errored_items (bool): Whether an item that fails is reported and skipped instead of stopping the run.
+
+    Returns:
+        bool: Whether every item was gone through, False if the time budget ran out first.
+    """
+    from src.plan import write_plan
+    from src.prefetch import prefetch, release
+
+    if args.plan_output is not None:
+        with open(args.plan_output, "w") as f:
+            write_plan(bot, items, f, workers=args.workers)
+        return True
+    import pywikibot
+    from wikidata_bot_framework import report_exception
+
+    deadline = None
+    if args.time_budget is not None:
+        deadline = time.monotonic() + args.time_budget
+    for processed, item in enumerate(prefetch(items)):
+        if deadline is not None and time.monotonic() >= deadline:
+            pywikibot.info(f"Time budget used up after {processed} item(s), stopping.")
+            return False
+        try:
+            bot.act_on_item(item)
+        except Exception as e:
+            if not skip_errored_items:
+                raise
+            report_exception(e)
+        finally:
+            release(item)
+    return True
+
+
+def query_items_by_value(sparql: str) -> Iterator["pywikibot.ItemPage"]:
+    """Yields the items a SPARQL query returns, the ones most worth processing first (see ProcessingHistory.order).
+
+    Only the numeric IDs are kept while the items are processed, the ItemPages are created as they are needed.
+    """
+    import pywikibot
+    from pywikibot.data.sparql import SparqlQuery
+
+    from src.constants import site
+    from src.scheduler import get_processing_history
+
+    qids = SparqlQuery(repo=site).get_items(sparql, item_name="item")
+    ids = get_processing_history().order(int(qid[1:]) for qid in qids)
+    del qids
+    for id in ids:
+        yield pywikibot.ItemPage(site, f"Q{id}")
 
 
 def act_on_item_string(
-    bot: MangaImportBot,
+    bot: "MangaImportBot",
     item_string: str,
     copy_from_item_string: Union[str, None] = None,
 ):
+    import pywikibot
+
+    from src.constants import site
+    from src.copy_labels import copy_labels
+
     item = pywikibot.ItemPage(site, item_string)
     bot.act_on_item(item)
     if copy_from_item_string:
@@ -37,11 +168,51 @@ def act_on_item_string(
 
 
 def main(argv=None):
+    args = parser.parse_args(argv)
+    if args.enqueue:
+        # Only needs the queue, so that other tools can enqueue items without logging in.
+        from src.work_queues import SQLiteWorkQueue
+
+        if args.input_file is None and args.item is None:
+            parser.error("You must specify an input file or an item to enqueue.")
+        queue = SQLiteWorkQueue(args.queue)
+        queue.put_many(
+            read_item_file(args.input_file) if args.input_file else [args.item.strip()],
+            args.priority,
+        )
+        queue.close()
+        return
+    # pywikibot, the providers and the bot are only imported after the arguments have been parsed,
+    # so that --help doesn't pay for logging in and building sessions.
+    import pywikibot
+    from wikidata_bot_framework import get_random_hex
+
+    from src import parse_pool
+    from src.constants import get_session, site
+    from src.main import MangaImportBot
+
+    if args.parse_workers:
+        parse_pool.configure(args.parse_workers)
+        atexit.register(parse_pool.shutdown)
     bot = MangaImportBot()
-    args = parser.parse_args()
+    # Bad data reports are posted in batches, so post whatever is left when the run ends.
+    atexit.register(bot.report_sink.close)
+    if args.apply_plan is not None:
+        from src.data.edit_plan import EditPlan
+        from src.plan import apply_plan
+
+        if args.automatic:
+            bot.set_hash(get_random_hex())
+        apply_plan(bot, map(EditPlan.from_json, read_item_file(args.apply_plan)))
+        return
     if args.automatic:
         bot.set_hash(get_random_hex())
-        if args.input_file is not None or args.item is not None:
+        if (
+            args.input_file is not None
+            or args.item is not None
+            or args.daemon
+            or args.incremental
+        ):
             pass
         elif args.copy_from is not None:
             parser.error("Automatic mode cannot be used with copy-from.")
@@ -53,18 +224,35 @@ def main(argv=None):
                 ]
             )
             complete_sparql = "SELECT DISTINCT ?item WHERE { %s }" % props_sparql
-            items = sorted(
-                [
-                    item
-                    for item in WikidataSPARQLPageGenerator(complete_sparql, site=site)
-                ],
-                key=lambda item: item.getID(numeric=True),
-                reverse=True,
-            )
-            for item in items:
-                bot.act_on_item(item)
-                session.remove_expired_responses()
+            process_items(bot, query_items_by_value(complete_sparql), args)
+            get_session().remove_expired_responses()
 
+    if args.incremental:
+        from src.crosswalk import get_fresh_crosswalk_index
+        from src.incremental import FeedCursors, poll_feeds
+        from src.providers import providers
+
+        cursors = FeedCursors()
+        qids, new_cursors = poll_feeds(
+            providers.values(), cursors, get_fresh_crosswalk_index()
+        )
+        pywikibot.info(f"{len(qids)} changed item(s) to process")
+        # The cursors only move forward once every changed item has been gone through. Items that fail
+        # are reported and skipped, so that one of them can't hold the feeds back on every run.
+        if process_items(
+            bot,
+            (pywikibot.ItemPage(site, qid) for qid in qids),
+            args,
+            skip_errored_items=True,
+        ):
+            cursors.set_many(new_cursors)
+        return
+    if args.daemon:
+        from src.daemon import Daemon
+        from src.work_queues import SQLiteWorkQueue
+
+        Daemon(bot, SQLiteWorkQueue(args.queue), workers=args.workers).run()
+        return
     if args.input_file is None and args.item is None:
         parser.error("You must specify either an input file or an item.")
     if args.input_file is not None and args.item is not None:
@@ -72,9 +260,14 @@ def main(argv=None):
     if args.input_file is not None:
         if args.copy_from is not None:
             parser.error("You cannot specify both an input file and a copy-from item.")
-        with open(args.input_file, "r") as f:
-            for line in f:
-                act_on_item_string(bot, line.strip())
+        items = (
+            pywikibot.ItemPage(site, qid) for qid in read_item_file(args.input_file)
+        )
+        process_items(bot, items, args)
+    elif args.plan_output is not None:
+        if args.copy_from is not None:
+            parser.error("You cannot specify both --plan-output and a copy-from item.")
+        process_items(bot, [pywikibot.ItemPage(site, args.item.strip())], args)
     else:
         act_on_item_string(
             bot,
@@ -1,16 +1,25 @@
 from abc import ABC, abstractmethod
+import datetime
+import json
 import time
-from typing import Any, Literal, Union
+import urllib.parse
+from typing import TYPE_CHECKING, Any, Iterator, Literal, Union
 
 from requests import Response
 import requests
-from wikidata_bot_framework import EntityPage, Output
+from wikidata_bot_framework import EntityPage
 
-from ..constants import session as requests_session, spoofed_chrome_user_agent
+from .. import json_decoder, metrics, parse_pool
+from ..circuit_breaker import get_breaker
+from ..constants import get_session, get_streaming_session, spoofed_chrome_user_agent
 from ..data.reference import Reference
 from ..data.results import Result
-from ..exceptions import NotFoundException
+from ..exceptions import CircuitOpenError, FeedTruncatedError, NotFoundException
 from ..pywikibot_stub_types import WikidataReference
+from ..retry import RetryPolicy
+
+if TYPE_CHECKING:
+    from ..post_process import ItemWalker
 
 _JSONType = Union[str, int, float, bool, list[Any], dict[str, Any]]
 
@@ -18,7 +27,21 @@ _JSONType = Union[str, int, float, bool, list[Any], dict[str, Any]]
 class Provider(ABC):
     name: str
     prop: str
-    session = requests_session
+    retry_policy: RetryPolicy = RetryPolicy()
+    # Dotted paths of the fields get reads from the main JSON response. Providers whose API can select
+    # fields build their request from it (see projection), the others pass it to do_request_with_retries
+    # so the rest is dropped right after decoding. None keeps the whole response.
+    json_fields: Union[tuple[str, ...], None] = None
+    # The most pages iter_changed_ids reads in one poll.
+    max_feed_pages: int = 200
+
+    @property
+    def session(self) -> requests.Session:
+        return get_session()
+
+    @property
+    def streaming_session(self) -> requests.Session:
+        return get_streaming_session()
 
     @abstractmethod
     def get(self, id: str, item: EntityPage) -> Result:
@@ -62,18 +85,33 @@ class Provider(ABC):
         """
         raise NotImplementedError
 
-    def post_process_hook(self, output: Output, item: EntityPage) -> bool:
-        """Runs after the item has been edited.
+    def register_post_process_handlers(self, walker: "ItemWalker") -> None:
+        """Registers handlers to run after the output has been applied to an item.
 
         This should be used to do any post-processing, such as replacing/deleting claims.
+        The item is walked once for all providers, so handlers should only look at the claims they are given.
 
         Args:
-            item (EntityPage): The item that was edited.
+            walker (ItemWalker): The walker to register the handlers on.
+        """
 
-        Returns:
-            bool: Whether the item has been edited.
+    def iter_changed_ids(self, since: datetime.datetime) -> Iterator[str]:
+        """Yields the IDs of the titles that changed on the provider since a time, for incremental runs.
+
+        IDs may repeat, and a title may be yielded under every form of ID the provider's property uses.
+        Requests should go through request_feed_page, so that a failed poll is noticed.
+
+        Args:
+            since (datetime.datetime): The time to look for changes after, in UTC.
+
+        Raises:
+            NotImplementedError: If the provider has no change feed.
+            FeedTruncatedError: If the feed has more than max_feed_pages pages, after yielding what was read.
+
+        Yields:
+            str: The provider IDs.
         """
-        return False
+        raise NotImplementedError
 
     # Provider utilities. They should mostly be staticmethods
 
@@ -93,20 +131,84 @@ class Provider(ABC):
         if r.status_code == 404:
             raise NotFoundException(r)
 
+    @staticmethod
+    def decode_json(
+        r: Response, fields: Union[tuple[str, ...], None] = None
+    ) -> _JSONType:
+        """Decodes a JSON response, in the parse process pool if it is enabled.
+
+        Responses that came from (or were written to) the cache are only decoded once, and later
+        cache hits get the same decoded object back, so the result must not be modified.
+
+        Args:
+            r (Response): The response to decode.
+            fields (Union[tuple[str, ...], None]): Dotted paths of the only fields to keep (see json_decoder.loads),
+                or None to keep everything.
+
+        Raises:
+            requests.JSONDecodeError: If the response is not valid JSON.
+
+        Returns:
+            _JSONType: The decoded JSON.
+        """
+
+        def decode() -> _JSONType:
+            return parse_pool.decode_json(r.content, fields)
+
+        try:
+            cache_key = json_decoder.response_cache_key(r)
+            if cache_key is None:
+                return decode()
+            return json_decoder.decoded_cache.get_or_decode(
+                (cache_key, fields), decode, len(r.content)
+            )
+        except json.JSONDecodeError as e:
+            raise requests.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
+    def request_feed_page(self, method: str, url: str, **kwargs) -> Any:
+        """Requests a page of a change feed, raising if it can't be fetched instead of returning None.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL.
+            **kwargs: Passed to do_request_with_retries.
+
+        Returns:
+            Any: The decoded page.
+        """
+        _, data = self.do_request_with_retries(
+            method,
+            url,
+            on_retry_limit_exhuasted_status_code="raise",
+            on_retry_limit_exhaused_exception="raise",
+            on_retry_limit_exhuasted_json_exception="raise",
+            **kwargs,
+        )
+        return data
+
+    def feed_truncated(
+        self, resume_at: Union[datetime.datetime, None] = None
+    ) -> FeedTruncatedError:
+        """Makes the error iter_changed_ids raises when it stops reading the feed at max_feed_pages.
+
+        Args:
+            resume_at (Union[datetime.datetime, None]): The time of the last change read, if the feed is read
+                oldest first.
+
+        Returns:
+            FeedTruncatedError: The error.
+        """
+        return FeedTruncatedError(
+            f"Stopped reading the {self.name} change feed after {self.max_feed_pages} pages",
+            resume_at,
+        )
+
     def do_request_with_retries(
         self,
         method: str,
         url: str,
         *,
-        retries: int = 3,
-        sleep_time_between_retries: float = 5,
-        retry_on_status_codes: tuple[int, ...] = tuple(),
-        retry_on_status_code_range: tuple[int, ...] = (5,),
-        retry_on_exceptions: tuple[type[Exception], ...] = (
-            requests.ConnectionError,
-            requests.exceptions.ChunkedEncodingError,
-            requests.exceptions.ContentDecodingError,
-        ),
+        retry_policy: Union[RetryPolicy, None] = None,
         on_retry_limit_exhuasted_status_code: Literal[
             "raise", "ignore", "return_none"
         ] = "return_none",
@@ -116,101 +218,104 @@ class Provider(ABC):
             "raise", "return_none"
         ] = "return_none",
         return_json: bool = True,
-        retry_on_json_exceptions: tuple[type[Exception], ...] = (
-            requests.JSONDecodeError,
-        ),
+        json_fields: Union[tuple[str, ...], None] = None,
         on_retry_limit_exhuasted_json_exception: Literal[
             "raise", "return_none"
         ] = "return_none",
         use_spoofed_user_agent: bool = False,
-        use_exponential_backoff: bool = False,
+        stream: bool = False,
         **kwargs,
     ) -> tuple[Union[requests.Response, None], Union[_JSONType, None]]:
+        """Makes a request, retrying it according to the provider's retry policy.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL.
+            retry_policy (Union[RetryPolicy, None]): Overrides the provider's retry_policy for this request.
+            on_retry_limit_exhuasted_status_code: What to do if the status is still retryable on the last attempt.
+            on_other_bad_status_code: What to do on other 4xx/5xx statuses.
+            not_found_on_request_404 (bool): Whether to raise NotFoundException on a 404.
+            on_retry_limit_exhaused_exception: What to do if the last attempt raised a retryable exception.
+            return_json (bool): Whether to decode the response as JSON.
+            json_fields (Union[tuple[str, ...], None]): The only JSON fields to keep, see decode_json.
+            on_retry_limit_exhuasted_json_exception: What to do if the last response was not valid JSON.
+            use_spoofed_user_agent (bool): Whether to pretend to be a browser.
+            stream (bool): Whether to leave the body unread, see streaming.stream_into.
+            **kwargs: Passed to requests.
+
+        Raises:
+            CircuitOpenError: If the host is failing and requests to it are being skipped.
+            NotFoundException: If not_found_on_request_404 is set and the response is a 404.
+
+        Returns:
+            tuple[Union[requests.Response, None], Union[_JSONType, None]]: The response and its JSON.
+        """
+        policy = retry_policy or self.retry_policy
         headers = {}
         if use_spoofed_user_agent:
             headers = {"User-Agent": spoofed_chrome_user_agent}
         if "headers" in kwargs:
             headers.update(kwargs["headers"])
-        else:
-            kwargs["headers"] = headers
-        recursive_kwargs = dict(
-            method=method,
-            url=url,
-            retries=retries - 1,
-            sleep_time_between_retries=sleep_time_between_retries,
-            retry_on_status_codes=retry_on_status_codes,
-            retry_on_status_code_range=retry_on_status_code_range,
-            retry_on_exceptions=retry_on_exceptions,
-            on_retry_limit_exhuasted_status_code=on_retry_limit_exhuasted_status_code,
-            on_other_bad_status_code=on_other_bad_status_code,
-            not_found_on_request_404=not_found_on_request_404,
-            on_retry_limit_exhaused_exception=on_retry_limit_exhaused_exception,
-            return_json=return_json,
-            retry_on_json_exceptions=retry_on_json_exceptions,
-            on_retry_limit_exhuasted_json_exception=on_retry_limit_exhuasted_json_exception,
-            use_spoofed_user_agent=use_spoofed_user_agent,
-            use_exponential_backoff=use_exponential_backoff,
-            **kwargs,
-        )
-        true_sleep_time = (
-            sleep_time_between_retries * pow(2, 3 - retries)
-            if use_exponential_backoff
-            else sleep_time_between_retries
-        )
-        try:
-            r = self.session.request(method, url, **kwargs)
-        except retry_on_exceptions:
-            if retries == 0:
-                if on_retry_limit_exhaused_exception == "return_none":
-                    return None, None
-                elif on_retry_limit_exhaused_exception == "raise":
+        kwargs["headers"] = headers
+        breaker = get_breaker(urllib.parse.urlparse(url).hostname or "")
+        state = policy.start()
+        while True:
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"Skipping {url}, its host has been failing")
+            request_kwargs = {"timeout": state.timeout(), **kwargs}
+            try:
+                if stream:
+                    # The body is left unread so that it can be passed to streaming.stream_into.
+                    r = self.streaming_session.request(
+                        method, url, stream=True, **request_kwargs
+                    )
+                else:
+                    r = self.session.request(method, url, **request_kwargs)
+            except policy.retry_on_exceptions:
+                breaker.record_failure()
+                if (delay := state.next_delay()) is None:
+                    if on_retry_limit_exhaused_exception == "return_none":
+                        return None, None
                     raise
-            else:
-                time.sleep(true_sleep_time)
-                return self.do_request_with_retries(**recursive_kwargs)
-        status = r.status_code
-        if status in retry_on_status_codes:
-            if retries == 0:
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Anything else still has to release the probe if the circuit is half-open.
+                breaker.record_failure()
+                raise
+            status = r.status_code
+            if policy.should_retry_status(status):
+                breaker.record_failure()
+                if (delay := state.next_delay()) is not None:
+                    r.close()
+                    time.sleep(delay)
+                    continue
                 if on_retry_limit_exhuasted_status_code == "return_none":
                     return None, None
                 elif on_retry_limit_exhuasted_status_code == "raise":
                     r.raise_for_status()
-                elif on_retry_limit_exhuasted_status_code == "ignore":
-                    pass
             else:
-                time.sleep(true_sleep_time)
-                return self.do_request_with_retries(**recursive_kwargs)
-        elif not_found_on_request_404 and status == 404:
-            raise NotFoundException(r)
-        elif status // 100 in retry_on_status_code_range:
-            if retries == 0:
-                if on_retry_limit_exhuasted_status_code == "return_none":
-                    return None, None
-                elif on_retry_limit_exhuasted_status_code == "raise":
-                    r.raise_for_status()
-                elif on_retry_limit_exhuasted_status_code == "ignore":
-                    pass
-            else:
-                time.sleep(true_sleep_time)
-                return self.do_request_with_retries(**recursive_kwargs)
-        elif status // 100 > 3:
-            if on_other_bad_status_code == "return_none":
-                return None, None
-            elif on_other_bad_status_code == "raise":
-                r.raise_for_status()
-            elif on_other_bad_status_code == "ignore":
-                pass
-        if return_json:
+                breaker.record_success()
+                if not_found_on_request_404 and status == 404:
+                    raise NotFoundException(r)
+                elif status // 100 > 3:
+                    if on_other_bad_status_code == "return_none":
+                        return None, None
+                    elif on_other_bad_status_code == "raise":
+                        r.raise_for_status()
+            if not stream and not getattr(r, "from_cache", False):
+                # Compare the average response size before and after changing what a provider requests.
+                metrics.increment(f"provider.{self.name}.responses")
+                metrics.increment(
+                    f"provider.{self.name}.response_bytes", len(r.content)
+                )
+            if not return_json:
+                return r, None
             try:
-                return r, r.json()
-            except retry_on_json_exceptions:
-                if retries == 0:
+                return r, self.decode_json(r, json_fields)
+            except policy.retry_on_json_exceptions:
+                if (delay := state.next_delay()) is None:
                     if on_retry_limit_exhuasted_json_exception == "return_none":
                         return r, None
-                    elif on_retry_limit_exhuasted_json_exception == "raise":
-                        raise
-                else:
-                    time.sleep(true_sleep_time)
-                    return self.do_request_with_retries(**recursive_kwargs)
-        else:
-            return r, None
+                    raise
+                time.sleep(delay)
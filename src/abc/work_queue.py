@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, Union
+
+from ..data.work_item import WorkItem
+
+
+class WorkQueue(ABC):
+    """A queue of items for the daemon to process.
+
+    Each item is only queued once; queueing it again raises its priority if the new one is higher.
+    Items are handed out highest priority first, then oldest first.
+    """
+
+    # Items that fail this many times are set aside instead of being retried.
+    max_attempts: int = 3
+
+    @abstractmethod
+    def put(self, qid: str, priority: int = 0) -> None:
+        """Queues an item.
+
+        Args:
+            qid (str): The item ID.
+            priority (int): The priority. Higher priorities are processed first.
+        """
+        raise NotImplementedError
+
+    def put_many(self, qids: Iterable[str], priority: int = 0) -> None:
+        for qid in qids:
+            self.put(qid, priority)
+
+    @abstractmethod
+    def get(self, timeout: Union[float, None] = None) -> Union[WorkItem, None]:
+        """Claims the next item, waiting for one to be queued if there are none.
+
+        The item must be passed to ack or fail once it has been processed.
+
+        Args:
+            timeout (Union[float, None]): How long to wait in seconds. None waits forever.
+
+        Returns:
+            Union[WorkItem, None]: The item, or None if the timeout passed.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def ack(self, work_item: WorkItem) -> None:
+        """Removes a processed item from the queue.
+
+        Args:
+            work_item (WorkItem): The item returned by get.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, work_item: WorkItem, error: str) -> None:
+        """Puts a failed item back in the queue, or sets it aside if it has failed max_attempts times.
+
+        Args:
+            work_item (WorkItem): The item returned by get.
+            error (str): What went wrong.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """The number of items waiting to be claimed."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,98 @@
+import enum
+import threading
+import time
+from typing import Union
+
+from . import metrics
+
+
+class CircuitState(enum.Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and requests are refused for
+    cooldown seconds. Then a single probe request is let through (half-open): if it succeeds the
+    circuit closes again, otherwise it stays open for another cooldown.
+    """
+
+    failure_threshold: int = 5
+    cooldown: float = 5 * 60
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: Union[int, None] = None,
+        cooldown: Union[float, None] = None,
+    ):
+        self.host = host
+        if failure_threshold is not None:
+            self.failure_threshold = failure_threshold
+        if cooldown is not None:
+            self.cooldown = cooldown
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        import pywikibot
+
+        pywikibot.warning(
+            f"Circuit for {self.host} is now {state.value} (was {self.state.value})"
+        )
+        metrics.increment(f"circuit_breaker.{self.host}.{state.value}")
+        self.state = state
+
+    def allow_request(self) -> bool:
+        """Checks whether a request may be sent to the host, claiming the probe if the circuit is half-open."""
+        with self._lock:
+            if self.state == CircuitState.open:
+                if time.monotonic() < self.opened_at + self.cooldown:
+                    allowed = False
+                else:
+                    self._transition(CircuitState.half_open)
+                    self._probe_in_flight = False
+            if self.state == CircuitState.half_open:
+                allowed = not self._probe_in_flight
+                self._probe_in_flight = True
+            elif self.state == CircuitState.closed:
+                allowed = True
+        if not allowed:
+            metrics.increment(f"circuit_breaker.{self.host}.rejected")
+        return allowed
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            self._transition(CircuitState.closed)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if (
+                self.state == CircuitState.half_open
+                or self.failures >= self.failure_threshold
+            ):
+                self.opened_at = time.monotonic()
+                self._transition(CircuitState.open)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
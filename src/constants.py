@@ -1,14 +1,15 @@
 import datetime
 import enum
+import functools
+import os
 import re
-import time
-from typing import MutableMapping, Union
+from typing import TYPE_CHECKING, Any, Union
 
-import pywikibot
-import requests
-from requests_cache import CachedSession
-import urllib.parse
-from wikidata_bot_framework import site
+if TYPE_CHECKING:
+    import pywikibot
+    from pywikibot.site import DataSite
+
+    from .session import RatelimitCachedSession, RatelimitSession
 
 # Constants for ids of properties that may be created
 genre_prop = "P136"
@@ -84,30 +85,31 @@ url_blacklist: list[Union[str, re.Pattern]] = [
     "pixiv.net",
 ]
 
-# Items for countries
-japan_item = pywikibot.ItemPage(site, "Q17")
-korea_item = pywikibot.ItemPage(site, "Q884")
-china_item = pywikibot.ItemPage(site, "Q148")
-
-# Items for languages
-japanese_lang_item = pywikibot.ItemPage(site, "Q5287")
-korean_lang_item = pywikibot.ItemPage(site, "Q9176")
-chinese_lang_item = pywikibot.ItemPage(site, "Q7850")
-english_lang_item = pywikibot.ItemPage(site, "Q1860")
-
-# Misc items
-volume_item = pywikibot.ItemPage(site, "Q1238720")
-link_rot_item = pywikibot.ItemPage(site, "Q1193907")
-redirect_item = pywikibot.ItemPage(site, "Q45403344")
-
-# Items for sources we pull from
-mal_item = pywikibot.ItemPage(site, "Q4044680")
-anilist_item = pywikibot.ItemPage(site, "Q86470198")
-md_item = pywikibot.ItemPage(site, "Q110093307")
-mu_item = pywikibot.ItemPage(site, "Q114730827")
-anime_planet_item = pywikibot.ItemPage(site, "Q112180497")
-inkr_item = pywikibot.ItemPage(site, "Q115633593")
-kitsu_item = pywikibot.ItemPage(site, "Q115633627")
+# QIDs of the items below. They are only turned into ItemPages when first accessed
+# (see __getattr__ at the bottom of this module), so importing this module stays cheap.
+_item_ids: dict[str, str] = {
+    # Items for countries
+    "japan_item": "Q17",
+    "korea_item": "Q884",
+    "china_item": "Q148",
+    # Items for languages
+    "japanese_lang_item": "Q5287",
+    "korean_lang_item": "Q9176",
+    "chinese_lang_item": "Q7850",
+    "english_lang_item": "Q1860",
+    # Misc items
+    "volume_item": "Q1238720",
+    "link_rot_item": "Q1193907",
+    "redirect_item": "Q45403344",
+    # Items for sources we pull from
+    "mal_item": "Q4044680",
+    "anilist_item": "Q86470198",
+    "md_item": "Q110093307",
+    "mu_item": "Q114730827",
+    "anime_planet_item": "Q112180497",
+    "inkr_item": "Q115633593",
+    "kitsu_item": "Q115633627",
+}
 
 # Regexes for matching external IDs
 niconico_regex = re.compile(r"seiga\.nicovideo\.jp/comic/(\d+)")
@@ -123,110 +125,82 @@ ebookjapan_regex = re.compile(r"ebookjapan\.yahoo\.co\.jp/books/(\d+)")
 
 
 class Genres(enum.Enum):
-    action = pywikibot.ItemPage(site, "Q15637293")
-    adventure = pywikibot.ItemPage(site, "Q15712918")
-    autobiographical = pywikibot.ItemPage(site, "Q115264777")
-    bara = pywikibot.ItemPage(site, "Q18655723")
-    comedy = pywikibot.ItemPage(site, "Q15286013")
-    comedy_drama = pywikibot.ItemPage(site, "Q15712927")
-    cute_girls_doing_cute_things = pywikibot.ItemPage(site, "Q101441130")
-    dark_fantasy = pywikibot.ItemPage(site, "Q111254005")
-    drama = pywikibot.ItemPage(site, "Q15637299")
-    ecchi = pywikibot.ItemPage(site, "Q219559")
-    fantasy = pywikibot.ItemPage(site, "Q15637301")
-    gender_bender = pywikibot.ItemPage(site, "Q112224709")
-    ghost_story = pywikibot.ItemPage(site, "Q111254004")
-    harem = pywikibot.ItemPage(site, "Q690342")
-    hentai = pywikibot.ItemPage(site, "Q172067")
-    historical = pywikibot.ItemPage(site, "Q101240934")
-    horror = pywikibot.ItemPage(site, "Q12767035")
-    isekai = pywikibot.ItemPage(site, "Q53911753")
-    iyashikei = pywikibot.ItemPage(site, "Q97358333")
-    lolicon = pywikibot.ItemPage(site, "Q309227")
-    magical_girl = pywikibot.ItemPage(site, "Q752321")
-    mahjong = pywikibot.ItemPage(site, "Q382236")
-    mecha = pywikibot.ItemPage(site, "Q4292083")
-    mystery = pywikibot.ItemPage(site, "Q15637305")
-    post_apocalyptic = pywikibot.ItemPage(site, "Q103016666")
-    psychological = pywikibot.ItemPage(site, "Q101240583")
-    romance = pywikibot.ItemPage(site, "Q15637310")
-    romantic_comedy = pywikibot.ItemPage(site, "Q15712145")
-    school = pywikibot.ItemPage(site, "Q5366097")
-    science_fiction = pywikibot.ItemPage(site, "Q5366020")
-    shotacon = pywikibot.ItemPage(site, "Q597887")
-    slice_of_life = pywikibot.ItemPage(site, "Q15428604")
-    spokon = pywikibot.ItemPage(site, "Q2281511")
-    sports = pywikibot.ItemPage(site, "Q11313192")
-    supernatural = pywikibot.ItemPage(site, "Q61942616")
-    survival = pywikibot.ItemPage(site, "Q100965156")
-    suspense = pywikibot.ItemPage(site, "Q101240878")
-    thriller = pywikibot.ItemPage(site, "Q101240755")
-    vampire = pywikibot.ItemPage(site, "Q111019582")
-    werewolf = pywikibot.ItemPage(site, "Q113259305")
-    yaoi = pywikibot.ItemPage(site, "Q242488")
-    yuri = pywikibot.ItemPage(site, "Q320568")
-    zombie = pywikibot.ItemPage(site, "Q113259324")
+    action = "Q15637293"
+    adventure = "Q15712918"
+    autobiographical = "Q115264777"
+    bara = "Q18655723"
+    comedy = "Q15286013"
+    comedy_drama = "Q15712927"
+    cute_girls_doing_cute_things = "Q101441130"
+    dark_fantasy = "Q111254005"
+    drama = "Q15637299"
+    ecchi = "Q219559"
+    fantasy = "Q15637301"
+    gender_bender = "Q112224709"
+    ghost_story = "Q111254004"
+    harem = "Q690342"
+    hentai = "Q172067"
+    historical = "Q101240934"
+    horror = "Q12767035"
+    isekai = "Q53911753"
+    iyashikei = "Q97358333"
+    lolicon = "Q309227"
+    magical_girl = "Q752321"
+    mahjong = "Q382236"
+    mecha = "Q4292083"
+    mystery = "Q15637305"
+    post_apocalyptic = "Q103016666"
+    psychological = "Q101240583"
+    romance = "Q15637310"
+    romantic_comedy = "Q15712145"
+    school = "Q5366097"
+    science_fiction = "Q5366020"
+    shotacon = "Q597887"
+    slice_of_life = "Q15428604"
+    spokon = "Q2281511"
+    sports = "Q11313192"
+    supernatural = "Q61942616"
+    survival = "Q100965156"
+    suspense = "Q101240878"
+    thriller = "Q101240755"
+    vampire = "Q111019582"
+    werewolf = "Q113259305"
+    yaoi = "Q242488"
+    yuri = "Q320568"
+    zombie = "Q113259324"
+
+    @property
+    def item(self) -> "pywikibot.ItemPage":
+        return get_item(self.value)
 
 
 class Demographics(enum.Enum):
-    seinen = pywikibot.ItemPage(site, "Q237338")
-    shonen = pywikibot.ItemPage(site, "Q231302")
-    children = pywikibot.ItemPage(site, "Q478804")
-    shojo = pywikibot.ItemPage(site, "Q242492")
-    josei = pywikibot.ItemPage(site, "Q503106")
+    seinen = "Q237338"
+    shonen = "Q231302"
+    children = "Q478804"
+    shojo = "Q242492"
+    josei = "Q503106"
+
+    @property
+    def item(self) -> "pywikibot.ItemPage":
+        return get_item(self.value)
 
 
-language_item_to_code_map = {
-    japanese_lang_item: "ja",
-    korean_lang_item: "ko",
-    chinese_lang_item: "zh",
+_language_item_codes = {
+    "japanese_lang_item": "ja",
+    "korean_lang_item": "ko",
+    "chinese_lang_item": "zh",
 }
 
+bot_user_agent = "AniMangaDBImportBot/Wikidata (https://wikidata.org/wiki/User:AniMangaDBImportBot) (abuse: https://wikidata.org/wiki/User_talk:RPI2026F1)"
 
-class RatelimitSession(requests.Session):
-    ratelimit_by_host: dict[str, float] = {"graphql.anilist.co": 2, "api.jikan.moe": 1}
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.last_request_by_host: dict[str, int] = {}
-
-    def request(
-        self,
-        method: str,
-        url: str,
-        *args,
-        headers: MutableMapping[str, str] | None = None,
-        **kwargs,
-    ):
-        parsed = urllib.parse.urlparse(url)
-        host = parsed.hostname
-        if host in self.ratelimit_by_host:
-            if host in self.last_request_by_host:
-                last_request = self.last_request_by_host[host]
-                if (
-                    last_request + self.ratelimit_by_host[host]
-                    > datetime.datetime.now().timestamp()
-                ):
-                    sleep_secs = (
-                        last_request
-                        + self.ratelimit_by_host[host]
-                        - datetime.datetime.now().timestamp()
-                    )
-                    time.sleep(sleep_secs)
-            self.last_request_by_host[host] = datetime.datetime.now().timestamp()
-        return super().request(method, url, *args, headers=headers, **kwargs)
-
-
-class RatelimitCachedSession(CachedSession, RatelimitSession):
-    pass
-
-
-session = RatelimitCachedSession(backend="memory")
-session.headers[
-    "user-agent"
-] = "AniMangaDBImportBot/Wikidata (https://wikidata.org/wiki/User:AniMangaDBImportBot) (abuse: https://wikidata.org/wiki/User_talk:RPI2026F1)"
-
-bad_import_page = pywikibot.Page(site, "User:RPI2026F1Bot/Task1/Import errors")
+bad_import_page_title = "User:RPI2026F1Bot/Task1/Import errors"
+
+# Where local state (queues, caches) is kept between runs.
+state_dir = os.environ.get("MANGA_IMPORT_STATE_DIR", "state")
+
+# The most response body bytes the in-memory HTTP cache holds before evicting the least recently used.
+session_cache_max_bytes = 256 * 1024 * 1024
 
 spoofed_chrome_epoch = datetime.date(2023, 1, 30)
 spoofed_chrome_epoch_version = 121
@@ -240,3 +214,75 @@ major = (
 )
 
 spoofed_chrome_user_agent = f"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36"
+
+
+@functools.cache
+def get_item(qid: str) -> "pywikibot.ItemPage":
+    """Gets the shared ItemPage for a QID, creating it on first use."""
+    import pywikibot
+
+    return pywikibot.ItemPage(get_site(), qid)
+
+
+def get_site() -> "DataSite":
+    from wikidata_bot_framework import site
+
+    return site
+
+
+@functools.cache
+def get_session() -> "RatelimitCachedSession":
+    from .session import BoundedMemoryCache, RatelimitCachedSession
+
+    session = RatelimitCachedSession(
+        backend=BoundedMemoryCache(max_bytes=session_cache_max_bytes)
+    )
+    session.headers["user-agent"] = bot_user_agent
+    return session
+
+
+@functools.cache
+def get_streaming_session() -> "RatelimitSession":
+    """Gets the uncached session used for streamed downloads.
+
+    requests-cache reads the whole body in order to cache it, which defeats closing the connection early.
+    """
+    from .session import RatelimitSession
+
+    session = RatelimitSession()
+    session.headers["user-agent"] = bot_user_agent
+    return session
+
+
+@functools.cache
+def get_bad_import_page() -> "pywikibot.Page":
+    import pywikibot
+
+    return pywikibot.Page(get_site(), bad_import_page_title)
+
+
+def get_state_path(filename: str) -> str:
+    """Gets the path of a file in the state directory, creating the directory if needed."""
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, filename)
+
+
+def __getattr__(name: str) -> Any:
+    # Lazily materializes the pywikibot/requests objects this module used to create at import time.
+    if name in _item_ids:
+        value = get_item(_item_ids[name])
+    elif name == "language_item_to_code_map":
+        value = {
+            get_item(_item_ids[item_name]): code
+            for item_name, code in _language_item_codes.items()
+        }
+    elif name == "site":
+        value = get_site()
+    elif name == "session":
+        value = get_session()
+    elif name == "bad_import_page":
+        value = get_bad_import_page()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -0,0 +1,297 @@
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+from .constants import get_state_path, mu_id_prop
+from .exceptions import QueryFailedError
+
+if TYPE_CHECKING:
+    import pywikibot
+
+# One record per (provider ID, item): the encoded ID and the numeric QID, sorted by both.
+_record = struct.Struct("<QI")
+# Provider properties whose IDs are base 36 numbers.
+base36_props = frozenset({mu_id_prop})
+# Set on the keys of IDs that are hashed rather than numbers, so that the two can't collide.
+_hashed_flag = 1 << 63
+
+
+def encode_id(prop: str, id: str) -> int:
+    """Encodes a provider ID as a 64-bit key.
+
+    Numeric and base 36 IDs are stored as their value, others (e.g. MangaDex UUIDs and slugs) as a 63-bit
+    hash, which at the index's size is practically collision-free.
+
+    Args:
+        prop (str): The provider property.
+        id (str): The provider ID.
+
+    Returns:
+        int: The key.
+    """
+    if prop in base36_props and id.isalnum() and id.isascii():
+        value = int(id, 36)
+    elif id.isdigit() and id.isascii():
+        value = int(id)
+    else:
+        value = None
+    if value is not None and value < _hashed_flag:
+        return value
+    digest = hashlib.blake2b(id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | _hashed_flag
+
+
+class SortedRecords:
+    """A read-only, memory-mapped file of sorted records, searched in place."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._mmap: Union[mmap.mmap, None] = None
+        if os.path.exists(path) and os.path.getsize(path) >= _record.size:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = len(self._mmap) // _record.size
+
+    def __getitem__(self, index: int) -> tuple[int, int]:
+        assert self._mmap is not None
+        return _record.unpack_from(self._mmap, index * _record.size)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for index in range(self.count):
+            yield self[index]
+
+    def find(self, key: int) -> list[int]:
+        """Gets the values of every record with the key, in O(log n)."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle][0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        values = []
+        while low < self.count and (record := self[low])[0] == key:
+            values.append(record[1])
+            low += 1
+        return values
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self.count = 0
+
+    @staticmethod
+    def write(path: str, records: Iterable[tuple[int, int]]) -> None:
+        """Writes sorted records, replacing the file atomically."""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            for record in records:
+                f.write(_record.pack(*record))
+        os.replace(temporary_path, path)
+
+
+class CrosswalkIndex:
+    """Maps provider IDs to the items that have them.
+
+    Each provider property has a file of sorted (encoded ID, numeric QID) records that is memory-mapped,
+    so lookups are binary searches that only touch a few pages. IDs added since the files were written
+    are kept in an append-only delta log and an in-memory overlay, and merged in by compact.
+    """
+
+    # How old the index may get before it is rebuilt from Wikidata, in seconds.
+    max_age: float = 24 * 60 * 60
+    # How many added IDs the overlay holds before they are merged into the files.
+    compact_after: int = 10000
+
+    def __init__(self, directory: Union[str, None] = None):
+        self.directory = directory or get_state_path("crosswalk")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.records: dict[str, SortedRecords] = {}
+        self.overlay: defaultdict[tuple[str, int], set[int]] = defaultdict(set)
+        self.overlay_size = 0
+        self._open()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self) -> None:
+        for records in self.records.values():
+            records.close()
+        self.records = {
+            name.removesuffix(".bin"): SortedRecords(self._path(name))
+            for name in os.listdir(self.directory)
+            if name.endswith(".bin")
+        }
+        self.overlay.clear()
+        self.overlay_size = 0
+        if os.path.exists(self._path("delta.jsonl")):
+            with open(self._path("delta.jsonl")) as f:
+                for line in f:
+                    prop, id, qid = json.loads(line)
+                    self.overlay[prop, encode_id(prop, id)].add(int(qid[1:]))
+                    self.overlay_size += 1
+
+    def built_at(self) -> Union[float, None]:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)["built_at"]
+        except FileNotFoundError:
+            return None
+
+    def is_stale(self) -> bool:
+        built_at = self.built_at()
+        return built_at is None or time.time() - built_at > self.max_age
+
+    def rebuild(self, entries: Iterable[tuple[str, str, str]]) -> int:
+        """Replaces the contents of the index.
+
+        Args:
+            entries (Iterable[tuple[str, str, str]]): (provider property, provider ID, QID) triples.
+
+        Raises:
+            ValueError: If there are no entries, which means the query for them went wrong.
+
+        Returns:
+            int: The number of entries in the index.
+        """
+        by_prop: defaultdict[str, set[tuple[int, int]]] = defaultdict(set)
+        for prop, id, qid in entries:
+            by_prop[prop].add((encode_id(prop, id), int(qid[1:])))
+        if not by_prop:
+            raise ValueError("Refusing to rebuild the crosswalk index without entries")
+        with self._lock:
+            for records in self.records.values():
+                records.close()
+            for prop, records in by_prop.items():
+                SortedRecords.write(self._path(f"{prop}.bin"), sorted(records))
+            for name in os.listdir(self.directory):
+                if name.endswith(".bin") and name.removesuffix(".bin") not in by_prop:
+                    os.remove(self._path(name))
+            with open(self._path("delta.jsonl"), "w"):
+                pass
+            self._open()
+            # Only marked as fresh once everything has been replaced.
+            with open(self._path("meta.json"), "w") as f:
+                json.dump({"built_at": time.time()}, f)
+        return sum(len(records) for records in by_prop.values())
+
+    def lookup(self, prop: str, id: str) -> list[str]:
+        """Gets the items that have a provider ID.
+
+        Args:
+            prop (str): The provider's property.
+            id (str): The provider ID.
+
+        Returns:
+            list[str]: The QIDs, usually just one.
+        """
+        key = encode_id(prop, id)
+        with self._lock:
+            ids = set(self.overlay.get((prop, key), ()))
+            if prop in self.records:
+                ids.update(self.records[prop].find(key))
+        return [f"Q{id}" for id in sorted(ids)]
+
+    def add(self, prop: str, id: str, qid: str) -> None:
+        """Adds a provider ID to the index, without waiting for the next rebuild.
+
+        Args:
+            prop (str): The provider's property.
+            id (str): The provider ID.
+            qid (str): The item that has it.
+        """
+        if qid in self.lookup(prop, id):
+            return
+        with self._lock:
+            with open(self._path("delta.jsonl"), "a") as f:
+                f.write(json.dumps([prop, id, qid]) + "\n")
+            self.overlay[prop, encode_id(prop, id)].add(int(qid[1:]))
+            self.overlay_size += 1
+            needs_compaction = self.overlay_size >= self.compact_after
+        if needs_compaction:
+            self.compact()
+
+    def update_item(self, item: "pywikibot.ItemPage") -> None:
+        """Adds the provider IDs an item has that the index doesn't know of yet.
+
+        Args:
+            item (pywikibot.ItemPage): The item, with its claims loaded.
+        """
+        from .providers import providers
+
+        for prop in providers:
+            for claim in item.claims.get(prop, []):
+                if claim.getRank() != "deprecated" and claim.getTarget():
+                    self.add(prop, claim.getTarget(), item.getID())
+
+    def compact(self) -> None:
+        """Merges the overlay into the record files."""
+        with self._lock:
+            by_prop: defaultdict[str, set[tuple[int, int]]] = defaultdict(set)
+            for (prop, key), ids in self.overlay.items():
+                by_prop[prop].update((key, id) for id in ids)
+            for prop, added in by_prop.items():
+                existing = self.records.get(prop)
+                merged = sorted(added.union(existing or ()))
+                if existing is not None:
+                    existing.close()
+                SortedRecords.write(self._path(f"{prop}.bin"), merged)
+            with open(self._path("delta.jsonl"), "w"):
+                pass
+            self._open()
+
+
+def query_provider_ids(props: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    """Gets every value of the given provider properties from the Wikidata Query Service, in one query.
+
+    Args:
+        props (Iterable[str]): The provider properties.
+
+    Raises:
+        QueryFailedError: If the query didn't return results, e.g. because it timed out.
+
+    Yields:
+        tuple[str, str, str]: (provider property, provider ID, QID) triples.
+    """
+    from pywikibot.data.sparql import SparqlQuery
+
+    from .constants import site
+
+    values = " ".join(f"wdt:{prop}" for prop in props)
+    rows = SparqlQuery(repo=site).select(
+        f"SELECT ?item ?prop ?id WHERE {{ VALUES ?prop {{ {values} }} ?item ?prop ?id. }}"
+    )
+    # select returns None instead of raising when the response isn't JSON, which is how timeouts come back.
+    if rows is None:
+        raise QueryFailedError("The query for the crosswalk index returned no results")
+    for row in rows:
+        yield (
+            row["prop"].rsplit("/", 1)[-1],
+            row["id"],
+            row["item"].rsplit("/", 1)[-1],
+        )
+
+
+@functools.cache
+def get_crosswalk_index() -> CrosswalkIndex:
+    return CrosswalkIndex()
+
+
+def get_fresh_crosswalk_index() -> CrosswalkIndex:
+    """Gets the crosswalk index, rebuilding it from Wikidata first if it is stale."""
+    from .providers import providers
+
+    index = get_crosswalk_index()
+    if index.is_stale():
+        index.rebuild(query_provider_ids(list(providers)))
+    return index
@@ -0,0 +1,80 @@
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import pywikibot
+from wikidata_bot_framework import report_exception
+
+from .abc.work_queue import WorkQueue
+from .constants import get_session, get_site
+
+if TYPE_CHECKING:
+    from .main import MangaImportBot
+
+
+class Daemon:
+    """Processes items from a work queue until told to stop.
+
+    The bot, its providers and their sessions and caches are shared by all workers and kept for the
+    whole lifetime of the daemon. SIGINT and SIGTERM stop the daemon once the items being processed
+    are done; a second signal stops it immediately.
+    """
+
+    # How long workers wait for an item before checking whether they should stop.
+    idle_timeout: float = 5
+    # How often expired responses are purged from the session cache.
+    cache_cleanup_interval: float = 10 * 60
+
+    def __init__(self, bot: "MangaImportBot", queue: WorkQueue, workers: int = 1):
+        self.bot = bot
+        self.queue = queue
+        self.workers = workers
+        self.stopping = threading.Event()
+
+    def stop(self, *_) -> None:
+        if self.stopping.is_set():
+            return
+        pywikibot.info("Stopping once the current items are done")
+        self.stopping.set()
+        # Let a second signal interrupt whatever is still running.
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    def process(self, qid: str) -> None:
+        self.bot.act_on_item(pywikibot.ItemPage(get_site(), qid))
+
+    def worker(self) -> None:
+        while not self.stopping.is_set():
+            work_item = self.queue.get(timeout=self.idle_timeout)
+            if work_item is None:
+                continue
+            try:
+                self.process(work_item.qid)
+            except Exception as e:
+                report_exception(e)
+                self.queue.fail(work_item, repr(e))
+            else:
+                self.queue.ack(work_item)
+
+    def run(self) -> None:
+        """Runs the workers until the daemon is stopped. Must be called from the main thread."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        threads = [
+            threading.Thread(target=self.worker, name=f"worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        pywikibot.info(
+            f"Started {self.workers} worker(s), {len(self.queue)} item(s) queued"
+        )
+        last_cleanup = time.monotonic()
+        while not self.stopping.wait(1):
+            if time.monotonic() - last_cleanup >= self.cache_cleanup_interval:
+                get_session().remove_expired_responses()
+                last_cleanup = time.monotonic()
+        for thread in threads:
+            thread.join()
+        self.queue.close()
@@ -0,0 +1,28 @@
+import dataclasses
+import json
+from typing import Any, Union
+
+
+@dataclasses.dataclass
+class EditPlan:
+    """An edit computed by MangaImportBot.plan_item, to be made later.
+
+    Attributes:
+        qid (str): The item ID.
+        base_revid (Union[int, None]): The revision the edit was computed against.
+        data (dict[str, Any]): The wbeditentity data: new and changed claims, including rank changes and
+            moved qualifiers.
+        summary (str): The edit summary.
+    """
+
+    qid: str
+    base_revid: Union[int, None]
+    data: dict[str, Any]
+    summary: str
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "EditPlan":
+        return cls(**json.loads(line))
@@ -1,7 +1,7 @@
 import dataclasses
 import datetime
 from collections import defaultdict
-from typing import Union
+from typing import Callable, Union
 
 import pywikibot
 
@@ -36,13 +36,59 @@ from ..constants import (
     url_blacklist,
     volume_item,
 )
+from .. import metrics
 from .bad_data import BadDataReport
 from wikidata_bot_framework import ExtraProperty, ExtraQualifier
 from .link import Link
 from .smart_precision_time import SmartPrecisionTime
+from ..templates import make_claim, shared_target
 
+# Called with a property, a value and its rank, returns whether the value can be left out of the output.
+SkipValue = Callable[[str, object, str], bool]
 
-@dataclasses.dataclass
+
+def _keep_value(prop: str, value: object, rank: str) -> bool:
+    return False
+
+
+def _time_target(
+    prop: str, value: Union[datetime.datetime, pywikibot.WbTime]
+) -> pywikibot.WbTime:
+    if not isinstance(value, datetime.datetime):
+        return value
+    year, month, day = value.year, value.month, value.day
+    return shared_target(
+        prop,
+        ("time", year, month, day),
+        lambda: SmartPrecisionTime(year=year, month=month, day=day),
+    )  # type: ignore
+
+
+def _skip_unusable(usable: frozenset[str], skip: SkipValue) -> SkipValue:
+    def skip_value(prop: str, value: object, rank: str) -> bool:
+        return prop not in usable or skip(prop, value, rank)
+
+    return skip_value
+
+
+def _droppable(extra_property: ExtraProperty) -> bool:
+    """Whether an ExtraProperty only adds its value, so that it can be dropped if the value is already there.
+
+    Replacing looks at other claims before the matching one, so those are kept too.
+    """
+    return (
+        not extra_property.qualifiers
+        and not extra_property.extra_references
+        and not extra_property.replace_if_conflicting_exists
+    )
+
+
+# A value a provider found, kept as plain data until the output is needed: property, target, rank and
+# ExtraProperty flags.
+PendingValue = tuple[str, object, str, dict[str, bool]]
+
+
+@dataclasses.dataclass(slots=True)
 class Result:
     genres: list[Genres] = dataclasses.field(default_factory=list)
     demographics: list[Demographics] = dataclasses.field(default_factory=list)
@@ -52,6 +98,7 @@ class Result:
     chapters: Union[int, None] = None
     links: list[Link] = dataclasses.field(default_factory=list)
 
+    values: list[PendingValue] = dataclasses.field(default_factory=list)
     other_properties: defaultdict[str, list[ExtraProperty]] = dataclasses.field(
         default_factory=lambda: defaultdict(list)
     )
@@ -61,9 +108,95 @@ class Result:
 
     new_id: str | None = None  # Sets a new ID for use by references
 
-    def simplify(self):
-        """Simplify the self to only have values in the other properties."""
-        if self.genres:
+    def add_value(
+        self, prop: str, target: object, rank: str = "normal", **flags: bool
+    ) -> None:
+        """Adds a value without qualifiers or references of its own.
+
+        Its claim is only built by simplify, and not at all if the item already has it.
+
+        Args:
+            prop (str): The property.
+            target (object): The target.
+            rank (str): The rank of the claim.
+            **flags (bool): ExtraProperty flags, e.g. skip_if_conflicting_exists.
+        """
+        self.values.append((prop, target, rank, flags))
+
+    def _add_claim(
+        self,
+        prop: str,
+        target: object,
+        skip: SkipValue,
+        rank: str = "normal",
+        **flags: bool,
+    ) -> Union[ExtraProperty, None]:
+        """Adds a claim to the other properties, unless skip says its value is already on the item."""
+        if skip(prop, target, rank):
+            metrics.increment("result.values_skipped")
+            return None
+        extra_property = ExtraProperty(make_claim(prop, target, rank), **flags)
+        self.other_properties[prop].append(extra_property)
+        return extra_property
+
+    def _drop_values(self, skip: SkipValue) -> None:
+        """Drops the other properties that skip says are already on the item."""
+        for prop, extra_properties in self.other_properties.items():
+            kept = [
+                extra_property
+                for extra_property in extra_properties
+                if not (
+                    _droppable(extra_property)
+                    and skip(
+                        prop,
+                        extra_property.claim.getTarget(),
+                        extra_property.claim.getRank(),
+                    )
+                )
+            ]
+            if len(kept) != len(extra_properties):
+                metrics.increment(
+                    "result.values_skipped", len(extra_properties) - len(kept)
+                )
+                self.other_properties[prop] = kept
+
+    def _drop_unusable(self, usable: frozenset[str]) -> None:
+        """Drops the values for properties that are not usable, whatever qualifiers or references they have."""
+        for prop in [prop for prop in self.other_properties if prop not in usable]:
+            metrics.increment(
+                "result.values_skipped", len(self.other_properties.pop(prop))
+            )
+        self.values = [value for value in self.values if value[0] in usable]
+
+    def simplify(
+        self,
+        skip: Union[SkipValue, None] = None,
+        usable: Union[frozenset[str], None] = None,
+    ):
+        """Simplify the self to only have values in the other properties.
+
+        Args:
+            skip (Union[SkipValue, None]): Called with a property, value and rank, returns whether the value
+                would leave the item unchanged (see ReferencedValues). Those values are dropped before their
+                claims are built. Values with qualifiers or references of their own are always kept.
+            usable (Union[frozenset[str], None]): The properties whose values would be used (see
+                MangaImportBot.get_usable_properties). Values for other properties are dropped before their
+                claims and targets are built, though the provider still fetched and parsed them. None means
+                all of them.
+        """
+        keep = _keep_value
+        if skip is None:
+            skip = _keep_value
+        else:
+            self._drop_values(skip)
+        if usable is not None:
+            self._drop_unusable(usable)
+            skip = _skip_unusable(usable, skip)
+            keep = _skip_unusable(usable, keep)
+        for prop, target, rank, flags in self.values:
+            self._add_claim(prop, target, skip, rank, **flags)
+        self.values.clear()
+        if self.genres and (usable is None or genre_prop in usable):
             if Genres.romance in self.genres and Genres.comedy in self.genres:
                 self.genres.append(Genres.romantic_comedy)
                 self.genres.remove(Genres.romance)
@@ -73,106 +206,45 @@ class Result:
                 self.genres.remove(Genres.comedy)
                 self.genres.remove(Genres.drama)
             for genre in set(self.genres):  # Dedupe
-                genre_claim = pywikibot.Claim(site, genre_prop)
-                genre_claim.setTarget(genre.value)
-                self.other_properties[genre_prop].append(ExtraProperty(genre_claim))
-        if self.demographics:
+                self._add_claim(genre_prop, genre.item, skip)
+        if self.demographics and (usable is None or demographic_prop in usable):
             for demographic in set(self.demographics):
-                demographic_claim = pywikibot.Claim(site, demographic_prop)
-                demographic_claim.setTarget(demographic.value)
-                self.other_properties[demographic_prop].append(
-                    ExtraProperty(demographic_claim)
-                )
-        if self.start_date:
-            if isinstance(self.start_date, datetime.datetime):
-                time_obj = SmartPrecisionTime(
-                    year=self.start_date.year,
-                    month=self.start_date.month,
-                    day=self.start_date.day,
-                )
-            else:
-                time_obj = self.start_date
-            start_claim = pywikibot.Claim(site, start_prop)
-            start_claim.setTarget(time_obj)
-            self.other_properties[start_prop].append(ExtraProperty(start_claim))
-        if self.end_date:
-            if isinstance(self.end_date, datetime.datetime):
-                time_obj = SmartPrecisionTime(
-                    year=self.end_date.year,
-                    month=self.end_date.month,
-                    day=self.end_date.day,
-                )
-            else:
-                time_obj = self.end_date
-            end_claim = pywikibot.Claim(site, end_prop)
-            end_claim.setTarget(time_obj)
-            self.other_properties[end_prop].append(ExtraProperty(end_claim))
-        if self.volumes:
-            quantity = pywikibot.WbQuantity(self.volumes, volume_item, site=site)
-            num_parts_claim = pywikibot.Claim(site, num_parts_prop)
-            num_parts_claim.setTarget(quantity)
-            self.other_properties[num_parts_prop].append(ExtraProperty(num_parts_claim))
+                self._add_claim(demographic_prop, demographic.item, skip)
+        if self.start_date and (usable is None or start_prop in usable):
+            self._add_claim(start_prop, _time_target(start_prop, self.start_date), skip)
+        if self.end_date and (usable is None or end_prop in usable):
+            self._add_claim(end_prop, _time_target(end_prop, self.end_date), skip)
+        if self.volumes and (usable is None or num_parts_prop in usable):
+            volumes = self.volumes
+            quantity = shared_target(
+                num_parts_prop,
+                ("volumes", volumes),
+                lambda: pywikibot.WbQuantity(volumes, volume_item, site=site),
+            )
+            self._add_claim(num_parts_prop, quantity, skip)
         for link in self.links:
             url = link.url
             if match := niconico_regex.search(url):
-                niconico_id = match.group(1)
-                niconico_claim = pywikibot.Claim(site, niconico_prop)
-                niconico_claim.setTarget(f"comic/{niconico_id}")
-                self.other_properties[niconico_prop].append(
-                    ExtraProperty(niconico_claim)
-                )
+                self._add_claim(niconico_prop, f"comic/{match.group(1)}", skip)
             elif match := bookwalker_regex.search(url):
                 prop_to_use = (
                     bookwalker_global_prop
                     if "global.bookwalker" in url
                     else bookwalker_prop
                 )
-                bookwalker_id = match.group(1)
-                bookwalker_claim = pywikibot.Claim(site, prop_to_use)
-                bookwalker_claim.setTarget(bookwalker_id)
-                self.other_properties[prop_to_use].append(
-                    ExtraProperty(bookwalker_claim)
-                )
+                self._add_claim(prop_to_use, match.group(1), skip)
             elif match := inkr_regex.search(url):
-                inkr_id = match.group(1)
-                inkr_claim = pywikibot.Claim(site, inkr_prop)
-                inkr_claim.setTarget(inkr_id)
-                self.other_properties[inkr_prop].append(ExtraProperty(inkr_claim))
+                self._add_claim(inkr_prop, match.group(1), skip)
             elif match := anime_news_network_regex.search(url):
-                anime_news_network_id = match.group(1)
-                anime_news_network_claim = pywikibot.Claim(
-                    site, anime_news_network_prop
-                )
-                anime_news_network_claim.setTarget(anime_news_network_id)
-                self.other_properties[anime_news_network_prop].append(
-                    ExtraProperty(anime_news_network_claim)
-                )
+                self._add_claim(anime_news_network_prop, match.group(1), skip)
             elif match := media_arts_regex.search(url):
-                media_arts_id = match.group(1)
-                media_arts_claim = pywikibot.Claim(site, media_arts_prop)
-                media_arts_claim.setTarget(f"C{media_arts_id}")
-                self.other_properties[media_arts_prop].append(
-                    ExtraProperty(media_arts_claim)
-                )
+                self._add_claim(media_arts_prop, f"C{match.group(1)}", skip)
             elif match := bgm_regex.search(url):
-                bgm_id = match.group(1)
-                bgm_claim = pywikibot.Claim(site, bgm_prop)
-                bgm_claim.setTarget(bgm_id)
-                self.other_properties[bgm_prop].append(ExtraProperty(bgm_claim))
+                self._add_claim(bgm_prop, match.group(1), skip)
             elif match := animeclick_regex.search(url):
-                animeclick_id = match.group(1)
-                animeclick_claim = pywikibot.Claim(site, animeclick_prop)
-                animeclick_claim.setTarget(animeclick_id)
-                self.other_properties[animeclick_prop].append(
-                    ExtraProperty(animeclick_claim)
-                )
+                self._add_claim(animeclick_prop, match.group(1), skip)
             elif match := ebookjapan_regex.search(url):
-                ebookjapan_id = match.group(1)
-                ebookjapan_claim = pywikibot.Claim(site, ebookjapan_prop)
-                ebookjapan_claim.setTarget(ebookjapan_id)
-                self.other_properties[ebookjapan_prop].append(
-                    ExtraProperty(ebookjapan_claim)
-                )
+                self._add_claim(ebookjapan_prop, match.group(1), skip)
             else:
                 if any(
                     (
@@ -183,13 +255,16 @@ class Result:
                     for blacklisted_url in url_blacklist
                 ):
                     continue
-                url_claim = pywikibot.Claim(site, described_at_url_prop)
-                url_claim.setTarget(url)
-                extra_prop = ExtraProperty(url_claim)
-                self.other_properties[described_at_url_prop].append(extra_prop)
-                if link.language:
-                    language_claim = pywikibot.Claim(site, language_prop)
-                    language_claim.setTarget(link.language)
+                # A language qualifier could still be missing, so those links are never skipped.
+                extra_prop = self._add_claim(
+                    described_at_url_prop,
+                    url,
+                    keep if link.language else skip,
+                )
+                if extra_prop is not None and link.language:
                     extra_prop.qualifiers[language_prop].append(
-                        ExtraQualifier(language_claim, skip_if_conflicting_exists=True)
+                        ExtraQualifier(
+                            make_claim(language_prop, link.language),
+                            skip_if_conflicting_exists=True,
+                        )
                     )
@@ -2,6 +2,8 @@ from typing import Optional
 
 import pywikibot
 
+from ..value_keys import value_key
+
 
 class SmartPrecisionTime(pywikibot.WbTime):
     def __init__(
@@ -19,5 +21,8 @@ class SmartPrecisionTime(pywikibot.WbTime):
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, pywikibot.WbTime):
-            return self.toWikibase() == other.toWikibase()
+            return value_key(self) == value_key(other)
         return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(value_key(self))
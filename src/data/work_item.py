@@ -0,0 +1,16 @@
+import dataclasses
+
+
+@dataclasses.dataclass(frozen=True)
+class WorkItem:
+    """An item handed to a worker by a work queue.
+
+    Attributes:
+        qid (str): The item ID.
+        priority (int): Higher priorities are processed first.
+        attempts (int): How many times the item has been handed to a worker, including this one.
+    """
+
+    qid: str
+    priority: int = 0
+    attempts: int = 1
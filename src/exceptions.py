@@ -1,6 +1,38 @@
+import datetime
+from typing import Union
+
+import requests
+
+
 class NotFoundException(Exception):
     """Used to denote that the given identifier was not found in the provider."""
 
 
 class AbortError(Exception):
     """Used to hit an except block."""
+
+
+class EditDeferred(Exception):
+    """Used to stop the bot framework from editing so that several passes can be saved in one edit."""
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Used to fail fast when requests to a host are skipped because it keeps failing."""
+
+
+class QueryFailedError(Exception):
+    """Used when the Wikidata Query Service doesn't return results, e.g. because the query timed out."""
+
+
+class FeedTruncatedError(Exception):
+    """Used when a change feed has more changes than are read in one poll.
+
+    Attributes:
+        resume_at (Union[datetime.datetime, None]): The time of the last change read, for feeds that are read
+            oldest first. The next poll can continue from there. None for feeds read newest first, which
+            can't be continued.
+    """
+
+    def __init__(self, message: str, resume_at: Union[datetime.datetime, None] = None):
+        super().__init__(message)
+        self.resume_at = resume_at
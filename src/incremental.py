@@ -0,0 +1,98 @@
+import datetime
+import sqlite3
+from typing import Iterable, Union
+
+import pywikibot
+from wikidata_bot_framework import report_exception
+
+from .abc.provider import Provider
+from .constants import get_state_path
+from .crosswalk import CrosswalkIndex
+from .exceptions import FeedTruncatedError
+
+_schema = """
+CREATE TABLE IF NOT EXISTS cursors (
+    prop TEXT PRIMARY KEY,
+    polled_at REAL NOT NULL
+)
+"""
+
+# How far back the first poll of a feed looks.
+initial_lookback = datetime.timedelta(days=1)
+# Feeds are polled from a bit before the last poll, in case a change was recorded late.
+cursor_overlap = datetime.timedelta(minutes=10)
+
+
+class FeedCursors:
+    """Remembers when each provider's change feed was last polled."""
+
+    def __init__(self, path: Union[str, None] = None):
+        self.connection = sqlite3.connect(path or get_state_path("feeds.sqlite3"))
+        self.connection.execute(_schema)
+        self.connection.commit()
+
+    def get(self, prop: str) -> Union[datetime.datetime, None]:
+        row = self.connection.execute(
+            "SELECT polled_at FROM cursors WHERE prop = ?", (prop,)
+        ).fetchone()
+        if row is None:
+            return None
+        return datetime.datetime.fromtimestamp(row[0], datetime.timezone.utc)
+
+    def set_many(self, cursors: dict[str, datetime.datetime]) -> None:
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO cursors (prop, polled_at) VALUES (?, ?)",
+            [(prop, polled_at.timestamp()) for prop, polled_at in cursors.items()],
+        )
+        self.connection.commit()
+
+
+def poll_feeds(
+    providers: Iterable[Provider], cursors: FeedCursors, index: CrosswalkIndex
+) -> tuple[list[str], dict[str, datetime.datetime]]:
+    """Finds the items whose titles changed on a provider since its feed was last polled.
+
+    Providers without a change feed are skipped. A feed that fails is reported and keeps its old cursor,
+    so the next run polls it again from there. The same goes for a feed with more changes than are read
+    in one poll, unless it is read oldest first, in which case its cursor moves to the last change read.
+
+    Args:
+        providers (Iterable[Provider]): The providers to poll.
+        cursors (FeedCursors): Where each feed was last polled.
+        index (CrosswalkIndex): The index to find the items with.
+
+    Returns:
+        tuple[list[str], dict[str, datetime.datetime]]: The changed QIDs, in the order they were found, and the
+            new cursors to save once they have been processed.
+    """
+    qids: dict[str, None] = {}
+    new_cursors: dict[str, datetime.datetime] = {}
+    for provider in providers:
+        polled_at = datetime.datetime.now(datetime.timezone.utc)
+        last_polled = cursors.get(provider.prop)
+        since = (
+            polled_at - initial_lookback
+            if last_polled is None
+            else last_polled - cursor_overlap
+        )
+        changed = 0
+        try:
+            for id in provider.iter_changed_ids(since):
+                changed += 1
+                for qid in index.lookup(provider.prop, id):
+                    qids[qid] = None
+        except NotImplementedError:
+            continue
+        except FeedTruncatedError as e:
+            pywikibot.warning(f"{e}, {changed} change(s) since {since:%Y-%m-%d %H:%M}")
+            if e.resume_at is not None:
+                new_cursors[provider.prop] = e.resume_at
+            continue
+        except Exception as e:
+            report_exception(e)
+            continue
+        pywikibot.info(
+            f"{provider.name}: {changed} change(s) since {since:%Y-%m-%d %H:%M}"
+        )
+        new_cursors[provider.prop] = polled_at
+    return list(qids), new_cursors
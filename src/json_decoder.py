@@ -0,0 +1,146 @@
+import functools
+import importlib.util
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Union
+
+from . import metrics
+
+# A tree of the fields to keep: each key maps to the fields to keep inside it, or None to keep it whole.
+FieldTree = dict[str, Union["FieldTree", None]]
+
+
+def _decode_with_orjson(content: Union[str, bytes]) -> Any:
+    import orjson
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers only need to catch the latter.
+    return orjson.loads(content)
+
+
+decoders: dict[str, Callable[[Union[str, bytes]], Any]] = {
+    "orjson": _decode_with_orjson,
+    "json": json.loads,
+}
+
+
+@functools.cache
+def default_decoder() -> str:
+    """Returns orjson if it is installed, falling back to the standard library otherwise."""
+    if importlib.util.find_spec("orjson") is None:
+        return "json"
+    return "orjson"
+
+
+@functools.lru_cache(maxsize=None)
+def compile_fields(fields: tuple[str, ...]) -> FieldTree:
+    """Turns dotted field paths (e.g. "data.attributes.tags") into a FieldTree.
+
+    Lists are transparent, so "data.genres.mal_id" keeps the mal_id of every genre.
+    """
+    tree: FieldTree = {}
+    for field in fields:
+        node = tree
+        *parents, leaf = field.split(".")
+        for part in parents:
+            child = node.setdefault(part, {})
+            if child is None:
+                # A shorter path already keeps the whole subtree.
+                break
+            node = child
+        else:
+            node[leaf] = None
+    return tree
+
+
+def project(value: Any, tree: Union[FieldTree, None]) -> Any:
+    """Drops everything from a decoded document that is not in the tree.
+
+    Args:
+        value (Any): The decoded document.
+        tree (Union[FieldTree, None]): The fields to keep, or None to keep everything.
+
+    Returns:
+        Any: The projected document. Missing fields are left out rather than added.
+    """
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(element, tree) for element in value]
+    if isinstance(value, dict):
+        return {
+            key: project(value[key], sub) for key, sub in tree.items() if key in value
+        }
+    return value
+
+
+def loads(
+    content: Union[str, bytes],
+    fields: Union[tuple[str, ...], None] = None,
+    decoder: Union[str, None] = None,
+) -> Any:
+    """Decodes JSON, keeping only the given fields.
+
+    This is a module-level function so that it can be run in the parse process pool, where
+    projecting before the result is pickled back also shrinks what has to be sent.
+
+    Args:
+        content (Union[str, bytes]): The JSON.
+        fields (Union[tuple[str, ...], None]): Dotted paths of the fields to keep, or None to keep everything.
+        decoder (Union[str, None]): The name of the decoder in decoders. Defaults to default_decoder().
+
+    Raises:
+        json.JSONDecodeError: If the content is not valid JSON.
+
+    Returns:
+        Any: The decoded JSON.
+    """
+    value = decoders[decoder or default_decoder()](content)
+    return project(value, compile_fields(fields) if fields else None)
+
+
+class DecodedCache:
+    """Remembers the decoded JSON of the most recent cached responses, so that cache hits are not decoded again.
+
+    Entries are weighed by the size of the body they were decoded from, and the least recently used
+    are evicted once they add up to more than max_bytes.
+    Entries are shared between callers, so decoded documents must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_decode(self, key: Hashable, decode: Callable[[], Any], size: int) -> Any:
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                metrics.increment("json_decoder.cache_hits")
+                return self.entries[key][0]
+        value = decode()
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            if key not in self.entries:
+                self.entries[key] = (value, size)
+                self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+        return value
+
+
+decoded_cache = DecodedCache()
+
+
+def response_cache_key(r: Any) -> Union[Hashable, None]:
+    """Gets a key identifying the body of a requests-cache response, or None if it was not cached.
+
+    The expiry is part of the key so that a refreshed cache entry is decoded again.
+    """
+    cache_key = getattr(r, "cache_key", None)
+    if cache_key is None:
+        return None
+    return cache_key, getattr(r, "expires", None)
@@ -1,4 +1,6 @@
+import contextvars
 import json
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import Union
 
@@ -12,30 +14,48 @@ from wikidata_bot_framework import (
     report_exception,
     start_span,
 )
-from wikidata_fast_query import ItemContainer, SingleClaimContainer
 
 from .abc.provider import Provider
 from .constants import (
     automated_create_properties,
-    bad_import_page,
     deprecated_reason_prop,
+    get_site,
     link_rot_item,
-    site,
     stated_at_prop,
     url_prop,
 )
-from .data.bad_data import BadDataReport
 from wikidata_bot_framework import ExtraProperty, ExtraQualifier, ExtraReference
+from .crosswalk import get_crosswalk_index
+from .data.edit_plan import EditPlan
 from .data.reference import Reference
 from .data.results import Result
-from .exceptions import NotFoundException
+from .exceptions import CircuitOpenError, EditDeferred, NotFoundException
+from .negative_cache import get_negative_cache
+from .post_process import ItemWalker, PostProcessContext
+from .report_sink import BadDataReportSink
+from .retry import item_budget
+from .scheduler import get_processing_history
+from .templates import make_claim
+from .value_keys import ReferencedValues
 from .providers import providers
 
 
 class MangaImportBot(PropertyAdderBot):
+    # How long the providers may spend retrying requests for one item, in seconds.
+    item_time_budget: float = 15 * 60
+    # How many provider IDs of one item are fetched at once.
+    provider_workers: int = 4
+
     def __init__(self):
         super().__init__()
         self.automated_hash = None
+        # Built up front so that worker threads never race to build it. It is cheap, since the providers'
+        # handlers are only registered once an item has their property.
+        self.walker = self.make_walker()
+        self.report_sink = BadDataReportSink()
+        self.provider_executor = ThreadPoolExecutor(
+            max_workers=self.provider_workers, thread_name_prefix="provider"
+        )
         self.set_config(Config(create_or_edit_main_property_whitelist_enabled=True))
 
     def set_hash(self, hash: Union[str, None]):
@@ -54,91 +74,171 @@ class MangaImportBot(PropertyAdderBot):
         ref.is_compatible_reference = partial(
             provider.compute_similar_reference, id=provider_id
         )  # type: ignore
-        stated_in_ref = pywikibot.Claim(site, stated_at_prop, is_reference=True)
-        stated_in_ref.setTarget(reference.stated_in)
-        ref.add_claim(stated_in_ref)
-        url_ref = pywikibot.Claim(site, url_prop, is_reference=True)
-        url_ref.setTarget(reference.url)
-        ref.add_claim(url_ref)
-        id_ref = pywikibot.Claim(site, provider.prop, is_reference=True)
-        id_ref.setTarget(provider_id)
-        ref.add_claim(id_ref)
+        ref.add_claim(
+            make_claim(stated_at_prop, reference.stated_in, is_reference=True)
+        )
+        ref.add_claim(make_claim(url_prop, reference.url, is_reference=True))
+        ref.add_claim(make_claim(provider.prop, provider_id, is_reference=True))
         return ref
 
+    def get_usable_properties(
+        self, provider: Provider, item: EntityPage
+    ) -> Union[frozenset[str], None]:
+        """Gets the output properties from a provider that would not be thrown away for an item.
+
+        In automatic mode, those are the properties whitelisted for the provider (see whitelisted_claim),
+        plus the properties the item already has, since matching claims can still get references.
+        Result.simplify drops the values for other properties before building their claims.
+
+        Args:
+            provider (Provider): The provider.
+            item (EntityPage): The item being processed.
+
+        Returns:
+            Union[frozenset[str], None]: The usable properties, or None if everything is usable.
+        """
+        if not self.automated_hash:
+            return None
+        return frozenset(
+            automated_create_properties["*"]
+            | automated_create_properties.get(provider.prop, set())
+            | set(item.claims)
+        )
+
+    def get_provider_result(
+        self,
+        provider: Provider,
+        provider_id: str,
+        item: EntityPage,
+    ) -> Union[Result, None]:
+        """Gets the data a provider has for an ID.
+
+        Args:
+            provider (Provider): The provider.
+            provider_id (str): The provider ID.
+            item (EntityPage): The item being processed.
+
+        Returns:
+            Union[Result, None]: The result, or None if the provider doesn't have the ID.
+        """
+        with start_span(
+            op="provider_value",
+            description=f"Getting data from provider {provider.name} for ID {provider_id}",
+        ):
+            # IDs that recently 404'd are treated as not found without asking the provider again.
+            known_not_found = get_negative_cache().contains(provider.prop, provider_id)
+            try:
+                if known_not_found:
+                    raise NotFoundException()
+                return provider.get(provider_id, item)
+            except NotFoundException:
+                if not known_not_found:
+                    get_negative_cache().add(provider.prop, provider_id)
+                return None
+
     def run_item(self, item: EntityPage) -> OutputHelper:
+        """Gets the data all providers have for an item.
+
+        The item's provider IDs are fetched concurrently. Provider IDs that the results link to
+        (e.g. the MAL ID MangaDex lists) are fetched in the same way right after, so that their data
+        goes into the same edit instead of waiting for the next run.
+        Values the item already has with the provider's reference are dropped before their claims are built.
+        In automatic mode, values for properties that would be thrown away are dropped the same way.
+
+        Args:
+            item (EntityPage): The item to process.
+
+        Returns:
+            OutputHelper: The output.
+        """
         oh = OutputHelper()
-        bad_data_reports: dict[Provider, list[BadDataReport]] = {}
-        for provider_property, provider in providers.items():
+        referenced_values = ReferencedValues(item)
+        seen: set[tuple[str, str]] = set()
+        wave: list[tuple[str, str]] = []
+        for provider_property in providers:
             if provider_property not in item.claims:
                 continue
-            with start_span(
-                op="provider_values",
-                description=f"Getting all data from provider {provider.name}",
-            ):
-                for value in item.claims[provider_property]:
-                    if value.getRank() == "deprecated":
+            for value in item.claims[provider_property]:
+                if value.getRank() == "deprecated":
+                    continue
+                if (provider_property, value.getTarget()) not in seen:
+                    seen.add((provider_property, value.getTarget()))
+                    wave.append((provider_property, value.getTarget()))
+        discovered = False
+        with item_budget(self.item_time_budget):
+            while wave:
+                futures = []
+                for provider_property, provider_id in wave:
+                    provider = providers[provider_property]
+                    # Each task gets a copy of the context so that the item budget applies in the worker threads.
+                    future = self.provider_executor.submit(
+                        contextvars.copy_context().run,
+                        self.get_provider_result,
+                        provider,
+                        provider_id,
+                        item,
+                    )
+                    futures.append((provider_property, provider_id, future))
+                wave = []
+                for provider_property, provider_id, future in futures:
+                    provider = providers[provider_property]
+                    try:
+                        result = future.result()
+                    except CircuitOpenError:
+                        # The provider is down, skip it until its circuit closes again.
                         continue
-                    provider_id = value.getTarget()
-                    with start_span(
-                        op="provider_value",
-                        description=f"Getting data from provider {provider.name} for ID {provider_id}",
-                    ):
-                        try:
-                            result: Result = provider.get(provider_id, item)
-                        except NotFoundException:
-                            claim = pywikibot.Claim(site, provider.prop)
-                            claim.setTarget(provider_id)
-                            claim.setRank("deprecated")
-                            extra_prop = ExtraProperty(claim)
-                            qual_claim = pywikibot.Claim(site, deprecated_reason_prop)
-                            qual_claim.setTarget(link_rot_item)
-                            extra_qual = ExtraQualifier(qual_claim)
-                            extra_prop.add_qualifier(extra_qual)
-                            extra_prop.add_reference(
-                                self.make_reference(
-                                    provider,
-                                    provider_id,
-                                    provider.get_reference(provider_id),
-                                )
-                            )
-                            oh.add_property(extra_prop)
-                            continue
-                        except Exception as e:
-                            report_exception(e)
+                    except Exception as e:
+                        report_exception(e)
+                        continue
+                    if result is None:
+                        if discovered:
+                            # Only IDs the item already has are marked as dead.
                             continue
-                        result.simplify()
-                        old_provider_id = provider_id  # noqa: F841 -- Keep a reference to the old provider ID just in case
-                        provider_id = result.new_id or provider_id
-                        if result.bad_data_reports:
-                            bad_data_reports[provider] = result.bad_data_reports
-                        reference = provider.get_reference(provider_id)
-                        for extra_properties in result.other_properties.values():
-                            for extra_property in extra_properties:
-                                extra_property.add_reference(
-                                    self.make_reference(
-                                        provider, provider_id, reference
-                                    )
-                                )
-                        oh.update(result.other_properties)
-        if bad_data_reports:
-            new_section = "== {{Q|%s}} ==\n" % item.getID()
-            for provider, reports in bad_data_reports.items():
-                new_section += f"=== {provider.name} ===\n"
-                for report_num, report in enumerate(reports, start=1):
-                    new_section += f"==== Report {report_num} ====\n"
-                    new_section += "'''Statement''': {{statement|%s|%s|%s}}\n" % (
-                        item.getID(),
-                        report.provider.prop,
-                        report.provider_id,
-                    )
-                    new_section += "'''Message''': %s\n" % report.message
-                    if report.data:
-                        new_section += (
-                            """'''Data''': <syntaxhighlight lang="json">\n%s\n</syntaxhighlight>\n"""
-                            % json.dumps(report.data, indent=4)
+                        extra_prop = ExtraProperty(
+                            make_claim(provider.prop, provider_id, "deprecated")
+                        )
+                        extra_qual = ExtraQualifier(
+                            make_claim(deprecated_reason_prop, link_rot_item)
+                        )
+                        extra_prop.add_qualifier(extra_qual)
+                        extra_prop.add_reference(
+                            self.make_reference(
+                                provider,
+                                provider_id,
+                                provider.get_reference(provider_id),
+                            )
                         )
-            bad_import_page.text += new_section
-            bad_import_page.save("Adding new bad data report", botflag=True, quiet=True)
+                        oh.add_property(extra_prop)
+                        continue
+                    old_provider_id = provider_id  # noqa: F841 -- Keep a reference to the old provider ID just in case
+                    provider_id = result.new_id or provider_id
+                    result.simplify(
+                        partial(referenced_values.is_referenced, provider, provider_id),
+                        self.get_usable_properties(provider, item),
+                    )
+                    seen.add((provider_property, provider_id))
+                    if result.bad_data_reports:
+                        self.report_sink.add(item.getID(), result.bad_data_reports)
+                    reference = provider.get_reference(provider_id)
+                    for (
+                        extra_property_prop,
+                        extra_properties,
+                    ) in result.other_properties.items():
+                        for extra_property in extra_properties:
+                            extra_property.add_reference(
+                                self.make_reference(provider, provider_id, reference)
+                            )
+                            if extra_property_prop not in providers:
+                                continue
+                            target = extra_property.claim.getTarget()
+                            if (
+                                isinstance(target, str)
+                                and (extra_property_prop, target) not in seen
+                            ):
+                                seen.add((extra_property_prop, target))
+                                wave.append((extra_property_prop, target))
+                    oh.update(result.other_properties)
+                discovered = True
         return oh
 
     def whitelisted_claim(self, prop: ExtraProperty) -> bool:
@@ -146,112 +246,344 @@ class MangaImportBot(PropertyAdderBot):
             return True
         if prop.claim.getID() in automated_create_properties["*"]:
             return True
-        for provider_prop in providers.values():
+        for provider_prop in providers:
             for ref in prop.extra_references:
                 if provider_prop in ref.new_reference_props:
                     return prop.claim.getID() in automated_create_properties.get(
-                        provider_prop.prop, set()
+                        provider_prop, set()
                     )
         return False
 
-    def move_qualifiers_from_deprecated_claims(self, item: EntityPage) -> bool:
-        container = ItemContainer(item)
-        acted = False
-        for provider_prop in providers.keys():
-            claims = container.claims(provider_prop)
-            if not claims:
-                continue
-            correct_claim: pywikibot.Claim | None = None
-            for claim_container in claims:
-                if claim_container.claim.getRank() == "deprecated":
-                    if not correct_claim:
-                        # We want to pick the right claim to move everything to.
-                        # We pick the preferred claim if it exists, or else we pick the normal claim.
-                        # If there are more than 1 preferred/normal claim, we throw an error
-                        # If there are more than 1 normal claim, and there is a preferred claim,
-                        # the bot will ignore the other normal claims.
-                        candidate_claims = [
-                            claim
-                            for claim in claims.claim_list
-                            if claim.getRank() != "deprecated"
-                        ]
-                        num_preferred = len(
-                            [
-                                claim
-                                for claim in candidate_claims
-                                if claim.getRank() == "preferred"
-                            ]
-                        )
-                        if num_preferred > 1:
-                            raise ValueError(
-                                f"More than one preferred claim found for property ${provider_prop} on item ${item.getID()}"
-                            )
-                        if num_preferred == 1:
-                            correct_claim = [
-                                claim
-                                for claim in candidate_claims
-                                if claim.getRank() == "preferred"
-                            ][0]
-                        elif len(candidate_claims) == 0:
-                            # Everything is deprecated, ?
-                            raise ValueError(
-                                f"Everything is deprecated for property ${provider_prop} on item ${item.getID()}"
-                            )
-                        else:
-                            # We pick the only normal claim (or throw an error if there are more than 1 normal claim)
-                            # If we didn't find any preferred claims, candidate_claims only contains normal claims
-                            if len(candidate_claims) > 1:
-                                raise ValueError(
-                                    f"More than one normal claim found for property ${provider_prop} on item ${item.getID()}"
-                                )
-                            correct_claim = candidate_claims[0]
-                    for (
-                        qualifier_prop,
-                        qualifier_values,
-                    ) in claim_container.qualifiers().items():
-                        if qualifier_prop == deprecated_reason_prop:
-                            continue
-                        correct_claim_container = SingleClaimContainer(correct_claim)
-                        # We only want to copy over new values for the qualifier
-                        existing_qualifier_claims = correct_claim.qualifiers.setdefault(
-                            qualifier_prop, []
-                        )
-                        existing_qualifier_values = correct_claim_container.qualifiers(
-                            qualifier_prop
-                        ).values()
-                        for (
-                            qualifier_claim,
-                            qualifier_value,
-                        ) in qualifier_values.claim_values():
-                            if qualifier_value not in existing_qualifier_values:
-                                existing_qualifier_claims.append(qualifier_claim)
-                                acted = True
-                        if claim_container.claim.qualifiers[qualifier_prop]:
-                            claim_container.claim.qualifiers[qualifier_prop] = []
-                            acted = True
-        return acted
+    def make_walker(self) -> ItemWalker:
+        walker = ItemWalker()
+        # Getting a provider instantiates it, so that is left until an item has its property.
+        for provider_prop in providers:
+            walker.add_deferred_handlers(
+                provider_prop, partial(self.register_handlers, provider_prop)
+            )
+        return walker
 
-    def post_output_process_hook(self, output: Output, item: EntityPage) -> bool:
-        edits_made = False
-        for provider in providers.values():
-            with start_span(
-                op="provider_post_process",
-                description=f"Running post-process hook for provider {provider.name}",
-            ):
-                edits_made |= provider.post_process_hook(output, item)
+    def get_walker(self) -> ItemWalker:
+        return self.walker
+
+    def register_handlers(self, provider_prop: str, walker: ItemWalker):
+        providers[provider_prop].register_post_process_handlers(walker)
+        walker.add_claim_handler(
+            provider_prop, self.move_qualifiers_from_deprecated_claims
+        )
+
+    def move_qualifiers_from_deprecated_claims(
+        self,
+        provider_prop: str,
+        claims: list[pywikibot.Claim],
+        context: PostProcessContext,
+    ) -> bool:
+        deprecated_claims: list[pywikibot.Claim] = []
+        preferred_claims: list[pywikibot.Claim] = []
+        normal_claims: list[pywikibot.Claim] = []
+        for claim in claims:
+            rank = claim.getRank()
+            if rank == "deprecated":
+                deprecated_claims.append(claim)
+            elif rank == "preferred":
+                preferred_claims.append(claim)
+            else:
+                normal_claims.append(claim)
+        if not deprecated_claims:
+            return False
+        # We want to pick the right claim to move everything to.
+        # We pick the preferred claim if it exists, or else we pick the normal claim.
+        # If there are more than 1 preferred/normal claim, we throw an error
+        # If there are more than 1 normal claim, and there is a preferred claim,
+        # the bot will ignore the other normal claims.
         try:
-            edits_made |= self.move_qualifiers_from_deprecated_claims(item)
+            if len(preferred_claims) > 1:
+                raise ValueError(
+                    f"More than one preferred claim found for property ${provider_prop} on item ${context.item.getID()}"
+                )
+            elif len(preferred_claims) == 1:
+                correct_claim = preferred_claims[0]
+            elif len(normal_claims) == 0:
+                # Everything is deprecated, ?
+                raise ValueError(
+                    f"Everything is deprecated for property ${provider_prop} on item ${context.item.getID()}"
+                )
+            elif len(normal_claims) > 1:
+                raise ValueError(
+                    f"More than one normal claim found for property ${provider_prop} on item ${context.item.getID()}"
+                )
+            else:
+                correct_claim = normal_claims[0]
         except ValueError as e:
             report_exception(e)
-        return edits_made
+            return False
+        acted = False
+        for claim in deprecated_claims:
+            for qualifier_prop, qualifier_claims in claim.qualifiers.items():
+                if qualifier_prop == deprecated_reason_prop:
+                    continue
+                # We only want to copy over new values for the qualifier
+                existing_qualifier_claims = correct_claim.qualifiers.setdefault(
+                    qualifier_prop, []
+                )
+                existing_qualifier_values = [
+                    qualifier_claim.getTarget()
+                    for qualifier_claim in existing_qualifier_claims
+                ]
+                for qualifier_claim in qualifier_claims:
+                    qualifier_value = qualifier_claim.getTarget()
+                    if qualifier_value not in existing_qualifier_values:
+                        existing_qualifier_claims.append(qualifier_claim)
+                        existing_qualifier_values.append(qualifier_value)
+                        acted = True
+                if qualifier_claims:
+                    claim.qualifiers[qualifier_prop] = []
+                    acted = True
+        return acted
+
+    def post_output_process_hook(self, output: Output, item: EntityPage) -> bool:
+        with start_span(
+            op="post_process",
+            description="Running post-process handlers",
+        ):
+            return self.get_walker().walk(item, output)
+
+    def pre_edit_process_hook(self, output: Output, item: EntityPage) -> None:
+        # PropertyAdderBot.process would edit after every pass, stop it so all passes go into one edit.
+        raise EditDeferred()
+
+    def converge(self, output: Output, item: EntityPage) -> bool:
+        """Applies the output and the post-process hooks to the local item until it stops changing.
+
+        Args:
+            output (Output): The output of run_item.
+            item (EntityPage): The item to process.
+
+        Returns:
+            bool: Whether the item needs to be edited.
+        """
+        acted = False
+        seen_hashes: set[int] = set()
+        while (item_hash := hash(json.dumps(item.toJSON()))) not in seen_hashes:
+            seen_hashes.add(item_hash)
+            try:
+                super().process(output, item)
+            except EditDeferred:
+                acted = True
+        return acted
+
+    def process(self, output: Output, item: EntityPage) -> bool:
+        """Converges the item locally, then edits it once.
+
+        Args:
+            output (Output): The output of run_item.
+            item (EntityPage): The item to process.
+
+        Returns:
+            bool: Whether the item was edited.
+        """
+        if not self.converge(output, item):
+            return False
+        return self.submit_edit(output, item)
 
     def act_on_item(self, item: EntityPage) -> bool:
-        edits_made = False
-        second_last_revid = None
-        last_revid = item.latest_revision_id
-        while super().act_on_item(item) and last_revid != second_last_revid:
-            edits_made = True
+        """Processes an item, and records it in the processing history if it succeeded.
+
+        Provider IDs added by the edit are added to the crosswalk index right away.
+
+        Args:
+            item (EntityPage): The item to process.
+
+        Returns:
+            bool: Whether the item was edited.
+        """
+        edited = super().act_on_item(item)
+        self.record_processed(item, edited)
+        return edited
+
+    def record_processed(self, item: EntityPage, edited: bool) -> None:
+        """Records a processed item in the processing history, and in the crosswalk index if it was edited.
+
+        Args:
+            item (EntityPage): The item, as it is after the edit.
+            edited (bool): Whether the item was edited.
+        """
+        if edited:
+            get_crosswalk_index().update_item(item)
+        get_processing_history().record(
+            item.getID(),
+            edited,
+            provider_count=sum(1 for prop in providers if prop in item.claims),
+        )
+
+    def plan_item(self, item: EntityPage) -> Union[EditPlan, None]:
+        """Computes the edit act_on_item would make to the item, without making it.
+
+        Args:
+            item (EntityPage): The item to plan. It is changed locally.
+
+        Returns:
+            Union[EditPlan, None]: The edit, or None if the item doesn't need one.
+        """
+        base_revid = item.latest_revision_id
+        with start_span(op="get_output", description="Get Output"):
+            output = self.run_item(item)
+        with start_span(op="process_output", description="Process Output"):
+            if not self.converge(output, item):
+                return None
+        data = item.toJSON(diffto=getattr(item, "_content", None))
+        if not data:
+            return None
+        return EditPlan(
+            qid=item.getID(),
+            base_revid=base_revid,
+            data=data,
+            summary=self.get_full_summary(self.get_edit_summary(item)),
+        )
+
+    def save_item(self, item: EntityPage) -> None:
+        """Saves the item and updates it from the wbeditentity response instead of downloading it again.
+
+        The item is only reloaded if the response doesn't hold the whole entity.
+
+        Args:
+            item (EntityPage): The item to save.
+        """
+        updates = item.repo.editEntity(
+            item,
+            item.toJSON(diffto=getattr(item, "_content", None)),
+            baserevid=getattr(item, "_revid", None),
+            summary=self.get_full_summary(self.get_edit_summary(item)),
+            bot=True,
+        )
+        self.load_edit_response(item, updates)
+
+    def load_edit_response(self, item: EntityPage, updates: dict) -> None:
+        """Brings a saved item up to date from the wbeditentity response, without downloading it again.
+
+        The entity in the response is not the item's content, only the statements that were sent. So the
+        locally converged item becomes the content later edits are diffed against, and only the new
+        revision ID and the IDs and hashes of the statements, qualifiers and references are taken from
+        the response.
+
+        Args:
+            item (EntityPage): The item that was edited.
+            updates (dict): The response.
+        """
+        entity = updates.get("entity", {})
+        if (
+            "lastrevid" not in entity
+            or not hasattr(item, "_content")
+            or not self.copy_claim_ids(item, entity.get("claims", {}))
+        ):
+            # Not what wbeditentity sends back. Without the IDs the next edit would add the statements again.
             item.get(force=True)
-            second_last_revid = last_revid
-            last_revid = item.latest_revision_id
-        return edits_made
+            return
+        item.latest_revision_id = entity["lastrevid"]
+        data = item.toJSON()
+        item._content = {
+            **item._content,
+            **{key: data.get(key, {}) for key in item.DATA_ATTRIBUTES},
+            "lastrevid": entity["lastrevid"],
+        }
+
+    @staticmethod
+    def copy_claim_ids(item: EntityPage, saved_claims: dict[str, list[dict]]) -> bool:
+        """Copies the IDs and hashes the saved statements got onto the item's claims.
+
+        Saved statements are matched to the claims they were sent from: by ID for the ones that had one,
+        and in order for the new ones, which is the order toJSON sent them in.
+
+        Args:
+            item (EntityPage): The item that was edited.
+            saved_claims (dict[str, list[dict]]): The statements in the response, by property.
+
+        Returns:
+            bool: Whether every saved statement was matched.
+        """
+        for prop, saved in saved_claims.items():
+            claims = item.claims.get(prop, [])
+            by_id = {claim.snak: claim for claim in claims if claim.snak}
+            new_claims = iter([claim for claim in claims if not claim.snak])
+            for data in saved:
+                if "remove" in data:
+                    continue
+                claim = by_id.get(data.get("id")) or next(new_claims, None)
+                if claim is None:
+                    return False
+                claim.snak = data["id"]
+                references = data.get("references", [])
+                if len(references) != len(claim.sources):
+                    return False
+                for source, reference in zip(claim.sources, references):
+                    for source_claims in source.values():
+                        for source_claim in source_claims:
+                            source_claim.hash = reference["hash"]
+                for qualifier_prop, qualifiers in data.get("qualifiers", {}).items():
+                    local_qualifiers = claim.qualifiers.get(qualifier_prop, [])
+                    if len(qualifiers) != len(local_qualifiers):
+                        return False
+                    for qualifier, qualifier_data in zip(local_qualifiers, qualifiers):
+                        qualifier.hash = qualifier_data["hash"]
+        return True
+
+    def apply_edit_plan(self, plan: EditPlan) -> None:
+        """Makes a planned edit, then runs the same steps act_on_item runs after an edit.
+
+        Plans don't keep the output they were computed from, so post_edit_process_hook gets an empty one.
+
+        Args:
+            plan (EditPlan): The edit.
+
+        Raises:
+            pywikibot.exceptions.APIError: If the edit failed, e.g. because of an edit conflict.
+        """
+        item = pywikibot.ItemPage(get_site(), plan.qid)
+        item.repo.editEntity(
+            item,
+            plan.data,
+            baserevid=plan.base_revid,
+            summary=plan.summary,
+            bot=True,
+        )
+        # Unlike save_item, there is no local copy of the item to keep, so the saved one is read.
+        item.get()
+        with start_span(op="post_edit_process", description="Post Edit Process Hook"):
+            self.post_edit_process_hook({}, item)
+        self.record_processed(item, True)
+
+    def submit_edit(self, output: Output, item: EntityPage) -> bool:
+        """Saves the converged item, then runs the post-edit hook.
+
+        After an edit conflict the item is reloaded, and the output is rebuilt for the new revision, since
+        the claims of the old one were already added to the stale item. Then it is converged again.
+
+        Args:
+            output (Output): The output of run_item.
+            item (EntityPage): The converged item.
+
+        Returns:
+            bool: Whether the item was saved, False if there was nothing left to do after an edit conflict.
+        """
+        with start_span(op="edit_entity", description="Edit Entity"):
+            retries = 3
+            while retries >= 0:
+                with start_span(
+                    op="edit_entity_try", description="Edit Entity Attempt"
+                ):
+                    try:
+                        self.save_item(item)
+                        break
+                    except pywikibot.exceptions.APIError as e:
+                        retries -= 1
+                        if retries < 0:
+                            raise
+                        if e.code == "editconflict":
+                            # Someone else edited the item, so redo the local passes on top of their revision.
+                            item.get(force=True)
+                            output = self.run_item(item)
+                            if not self.converge(output, item):
+                                return False
+        with start_span(op="post_edit_process", description="Post Edit Process Hook"):
+            self.post_edit_process_hook(output, item)
+        return True
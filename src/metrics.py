@@ -0,0 +1,27 @@
+import collections
+import threading
+
+_counters: collections.Counter[str] = collections.Counter()
+_lock = threading.Lock()
+
+
+def increment(name: str, value: float = 1) -> None:
+    """Adds a value to a process-wide counter.
+
+    Args:
+        name (str): The counter name, dotted by subsystem (e.g. "streaming.INKR.bytes_saved").
+        value (float): The amount to add.
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters[name]
+
+
+def snapshot() -> dict[str, float]:
+    """Returns a copy of all counters."""
+    with _lock:
+        return dict(_counters)
@@ -0,0 +1,133 @@
+import functools
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from typing import Union
+
+from . import metrics
+from .constants import get_state_path
+
+_schema = """
+CREATE TABLE IF NOT EXISTS not_found (
+    namespace TEXT NOT NULL,
+    id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, id)
+) WITHOUT ROWID
+"""
+
+
+class BloomFilter:
+    """A set of strings that can answer "definitely not present" without storing them.
+
+    Membership tests have no false negatives, and false positives at roughly error_rate while
+    no more than capacity keys have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(
+            math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        # Double hashing: the positions are h1 + i * h2 for the two halves of one digest.
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class NegativeCache:
+    """Remembers provider IDs that were not found, so they are not requested again until the entry expires.
+
+    Entries are kept in SQLite. A Bloom filter of all entries is kept in memory so that the common case,
+    an ID that was found, is answered without touching the database.
+    """
+
+    ttl: float = 14 * 24 * 60 * 60
+
+    def __init__(self, path: Union[str, None] = None, ttl: Union[float, None] = None):
+        self.connection = sqlite3.connect(
+            path or get_state_path("negative_cache.sqlite3"), check_same_thread=False
+        )
+        self.connection.execute(_schema)
+        self.connection.execute(
+            "DELETE FROM not_found WHERE expires_at <= ?", (time.time(),)
+        )
+        self.connection.commit()
+        if ttl is not None:
+            self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rebuild_filter()
+
+    def _rebuild_filter(self) -> None:
+        rows = self.connection.execute("SELECT namespace, id FROM not_found").fetchall()
+        # Leave room to grow before the filter has to be rebuilt.
+        self.filter = BloomFilter(max(len(rows) * 2, 1024))
+        for namespace, id in rows:
+            self.filter.add(f"{namespace}:{id}")
+
+    def contains(self, namespace: str, id: str) -> bool:
+        """Checks whether an ID is known to not exist.
+
+        Args:
+            namespace (str): What the ID belongs to, usually the provider's property.
+            id (str): The ID.
+
+        Returns:
+            bool: Whether the ID was not found and the entry hasn't expired.
+        """
+        with self._lock:
+            if f"{namespace}:{id}" not in self.filter:
+                return False
+            row = self.connection.execute(
+                "SELECT expires_at FROM not_found WHERE namespace = ? AND id = ?",
+                (namespace, id),
+            ).fetchone()
+        found = row is not None and row[0] > time.time()
+        metrics.increment(
+            "negative_cache.hits" if found else "negative_cache.false_positives"
+        )
+        return found
+
+    def add(self, namespace: str, id: str, ttl: Union[float, None] = None) -> None:
+        """Remembers that an ID was not found.
+
+        Args:
+            namespace (str): What the ID belongs to, usually the provider's property.
+            id (str): The ID.
+            ttl (Union[float, None]): How long to remember it for in seconds. Defaults to the cache's ttl.
+        """
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO not_found (namespace, id, expires_at) VALUES (?, ?, ?)",
+                (namespace, id, time.time() + (self.ttl if ttl is None else ttl)),
+            )
+            self.connection.commit()
+            self.filter.add(f"{namespace}:{id}")
+            if self.filter.count > self.filter.capacity:
+                self._rebuild_filter()
+        metrics.increment("negative_cache.added")
+
+
+@functools.cache
+def get_negative_cache() -> NegativeCache:
+    return NegativeCache()
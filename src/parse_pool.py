@@ -0,0 +1,74 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar, Union
+
+from . import json_decoder
+
+_T = TypeVar("_T")
+
+_executor: Union[ProcessPoolExecutor, None] = None
+
+# Payloads smaller than this are parsed in-process, pickling them over would cost more than it saves.
+min_offload_bytes = 64 * 1024
+
+
+def configure(workers: int) -> None:
+    """Starts (or, with 0 workers, stops) the parsing process pool.
+
+    Args:
+        workers (int): The number of worker processes.
+    """
+    global _executor
+    shutdown()
+    if workers > 0:
+        # Spawned rather than forked, since the parent has network threads running.
+        _executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def enabled() -> bool:
+    return _executor is not None
+
+
+def run(func: Callable[..., _T], *args: Any, size: Union[int, None] = None) -> _T:
+    """Runs a parse function, in the process pool if it is configured.
+
+    The function must be a module-level function, and its arguments and result must be plain
+    picklable data (e.g. bytes in, a ParserResult or dict out).
+
+    Args:
+        func (Callable[..., _T]): The parse function.
+        *args (Any): The arguments to call it with.
+        size (Union[int, None]): The payload size in bytes. Payloads under min_offload_bytes are parsed in-process.
+
+    Returns:
+        _T: The parse result.
+    """
+    if _executor is None or (size is not None and size < min_offload_bytes):
+        return func(*args)
+    return _executor.submit(func, *args).result()
+
+
+def decode_json(content: bytes, fields: Union[tuple[str, ...], None] = None) -> Any:
+    """Decodes a JSON response body, in the process pool if it is configured.
+
+    See json_decoder.loads for the fields argument.
+
+    Raises:
+        json.JSONDecodeError: If the content is not valid JSON.
+    """
+    return run(
+        json_decoder.loads,
+        content,
+        fields,
+        json_decoder.default_decoder(),
+        size=len(content),
+    )
@@ -0,0 +1,102 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, TextIO, Union
+
+import pywikibot
+from wikidata_bot_framework import report_exception
+
+from .constants import get_site
+from .data.edit_plan import EditPlan
+from .prefetch import batch_size, get_latest_revision_ids, prefetch, release
+
+if TYPE_CHECKING:
+    from .main import MangaImportBot
+
+
+def write_plan(
+    bot: "MangaImportBot",
+    items: Iterable[pywikibot.ItemPage],
+    output: TextIO,
+    workers: int = 4,
+) -> int:
+    """Plans the edits for many items at once and writes them as JSON lines, without editing anything.
+
+    Args:
+        bot (MangaImportBot): The bot to plan with.
+        items (Iterable[pywikibot.ItemPage]): The items to plan.
+        output (TextIO): Where to write the plan.
+        workers (int): The number of items to plan at once.
+
+    Returns:
+        int: The number of edits planned.
+    """
+    planned = 0
+
+    def plan(item: pywikibot.ItemPage) -> Union[EditPlan, None]:
+        try:
+            return bot.plan_item(item)
+        finally:
+            release(item)
+
+    def write_done(futures: set["Future[Union[EditPlan, None]]"]) -> None:
+        nonlocal planned
+        for future in futures:
+            try:
+                plan = future.result()
+            except Exception as e:
+                report_exception(e)
+                continue
+            if plan is not None:
+                output.write(plan.to_json() + "\n")
+                planned += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: set["Future[Union[EditPlan, None]]"] = set()
+        for item in prefetch(items):
+            # Only keep a couple of items per worker in flight, so the whole input is never loaded at once.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(done)
+            pending.add(executor.submit(plan, item))
+        write_done(wait(pending).done)
+    return planned
+
+
+def apply_plan(bot: "MangaImportBot", plans: Iterable[EditPlan]) -> tuple[int, int]:
+    """Makes the edits in a plan, one at a time.
+
+    Items that have been edited since they were planned are processed again from scratch instead, as are
+    the items of a batch whose latest revisions couldn't be looked up.
+    The edits go through pywikibot, so they follow its write throttle.
+
+    Args:
+        bot (MangaImportBot): The bot to re-plan items with.
+        plans (Iterable[EditPlan]): The planned edits.
+
+    Returns:
+        tuple[int, int]: The number of planned edits made and the number of items processed again.
+    """
+    applied = replanned = 0
+    iterator = iter(plans)
+    while batch := list(islice(iterator, batch_size)):
+        try:
+            latest_revids = get_latest_revision_ids(plan.qid for plan in batch)
+        except Exception as e:
+            report_exception(e)
+            latest_revids = {}
+        for plan in batch:
+            try:
+                base_revid = plan.base_revid
+                if base_revid is not None and latest_revids.get(plan.qid) == base_revid:
+                    try:
+                        bot.apply_edit_plan(plan)
+                        applied += 1
+                        continue
+                    except pywikibot.exceptions.APIError as e:
+                        if e.code != "editconflict":
+                            raise
+                bot.act_on_item(pywikibot.ItemPage(get_site(), plan.qid))
+                replanned += 1
+            except Exception as e:
+                report_exception(e)
+    return applied, replanned
@@ -0,0 +1,94 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    import pywikibot
+    from wikidata_bot_framework import EntityPage, Output
+
+# Called with the property, the item's (or the reference's) live list of claims for it and the walk context.
+# Handlers may mutate the list in place and return whether they changed anything.
+ClaimHandler = Callable[[str, list["pywikibot.Claim"], "PostProcessContext"], bool]
+
+
+@dataclass
+class PostProcessContext:
+    """The state shared by all handlers while walking one item."""
+
+    item: "EntityPage"
+    output: "Output"
+    # Scratch space for handlers that want to remember things between calls, e.g. resolved IDs.
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+class ItemWalker:
+    """Walks an item's claims and references once, dispatching to the handlers registered for each property.
+
+    Claim handlers get the full list of the item's claims for a property. Reference handlers get the list of
+    claims for a property inside one reference set, for every reference set on every claim of the item.
+    Handlers for the same property run in the order they were registered.
+
+    Handlers can also be registered on demand, the first time their property is found on an item (see
+    add_deferred_handlers).
+    """
+
+    def __init__(self):
+        self.claim_handlers: defaultdict[str, list[ClaimHandler]] = defaultdict(list)
+        self.reference_handlers: defaultdict[str, list[ClaimHandler]] = defaultdict(
+            list
+        )
+        self.deferred: dict[str, Callable[["ItemWalker"], None]] = {}
+        self._deferred_lock = threading.Lock()
+
+    def add_claim_handler(self, prop: str, handler: ClaimHandler):
+        self.claim_handlers[prop].append(handler)
+
+    def add_reference_handler(self, prop: str, handler: ClaimHandler):
+        self.reference_handlers[prop].append(handler)
+
+    def add_deferred_handlers(
+        self, prop: str, register: Callable[["ItemWalker"], None]
+    ):
+        """Registers handlers for a property only once the property is found in an item's claims or references.
+
+        Args:
+            prop (str): The property.
+            register (Callable[[ItemWalker], None]): Called with the walker once, registers the handlers.
+        """
+        self.deferred[prop] = register
+
+    def _resolve_deferred(self, prop: str):
+        if prop not in self.deferred:
+            return
+        with self._deferred_lock:
+            register = self.deferred.get(prop)
+            if register is not None:
+                register(self)
+                del self.deferred[prop]
+
+    def walk(self, item: "EntityPage", output: "Output") -> bool:
+        """Runs every registered handler against the item.
+
+        Args:
+            item (EntityPage): The item to post-process.
+            output (Output): The output that was applied to the item.
+
+        Returns:
+            bool: Whether any handler changed the item.
+        """
+        context = PostProcessContext(item, output)
+        edited = False
+        for prop, claims in list(item.claims.items()):
+            self._resolve_deferred(prop)
+            for handler in self.claim_handlers.get(prop, ()):
+                edited |= handler(prop, claims, context)
+            if not self.reference_handlers and not self.deferred:
+                continue
+            for claim in claims:
+                for reference_set in claim.sources:
+                    for reference_prop, reference_claims in reference_set.items():
+                        self._resolve_deferred(reference_prop)
+                        for handler in self.reference_handlers.get(reference_prop, ()):
+                            edited |= handler(reference_prop, reference_claims, context)
+        return edited
@@ -0,0 +1,98 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+import pywikibot
+from wikidata_bot_framework import report_exception
+
+from .constants import get_site
+
+# The most entities wbgetentities returns per request for non-privileged accounts.
+batch_size = 50
+# Only what the bot reads and what editing needs (info has the revision ID used as the edit's base).
+default_props = ("info", "claims", "labels")
+
+
+def load_batch(
+    items: Iterable[pywikibot.ItemPage], props: Iterable[str] = default_props
+) -> None:
+    """Loads the content of several items with one wbgetentities request.
+
+    Items that are already loaded, missing, or redirects are left alone, and load themselves when first used.
+
+    Args:
+        items (Iterable[pywikibot.ItemPage]): The items to load, at most batch_size of them.
+        props (Iterable[str]): The wbgetentities props to request.
+    """
+    by_id = {item.getID(): item for item in items if not hasattr(item, "_content")}
+    if not by_id:
+        return
+    try:
+        data = (
+            get_site()
+            .simple_request(action="wbgetentities", ids=list(by_id), props=list(props))
+            .submit()
+        )
+    except pywikibot.exceptions.Error as e:
+        report_exception(e)
+        return
+    for entity_id, content in data.get("entities", {}).items():
+        item = by_id.get(entity_id)
+        if item is None or "missing" in content or "redirects" in content:
+            continue
+        item._content = content
+        # Parses the claims and labels from _content without another request.
+        item.get()
+
+
+def prefetch(
+    items: Iterable[pywikibot.ItemPage], props: Iterable[str] = default_props
+) -> Iterator[pywikibot.ItemPage]:
+    """Yields the items in order, loading them batch_size at a time just before they are needed.
+
+    Args:
+        items (Iterable[pywikibot.ItemPage]): The items to load.
+        props (Iterable[str]): The wbgetentities props to request.
+
+    Yields:
+        pywikibot.ItemPage: The items, with their content loaded.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        load_batch(batch, props)
+        yield from batch
+
+
+def release(item: pywikibot.ItemPage) -> None:
+    """Drops the loaded content of an item once it has been processed, so that it can be freed.
+
+    The item stays usable: pywikibot loads it again if its content is accessed.
+
+    Args:
+        item (pywikibot.ItemPage): The item.
+    """
+    for attribute in ("_content", *item.DATA_ATTRIBUTES):
+        item.__dict__.pop(attribute, None)
+
+
+def get_latest_revision_ids(qids: Iterable[str]) -> dict[str, int]:
+    """Gets the current revision of several items with one wbgetentities request.
+
+    Args:
+        qids (Iterable[str]): The item IDs, at most batch_size of them.
+
+    Returns:
+        dict[str, int]: The revision ID of each item that exists and is not a redirect.
+    """
+    qids = list(qids)
+    if not qids:
+        return {}
+    data = (
+        get_site()
+        .simple_request(action="wbgetentities", ids=qids, props="info")
+        .submit()
+    )
+    return {
+        entity_id: content["lastrevid"]
+        for entity_id, content in data.get("entities", {}).items()
+        if "lastrevid" in content and "redirects" not in content
+    }
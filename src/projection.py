@@ -0,0 +1,64 @@
+from typing import Iterable
+
+from .json_decoder import FieldTree, compile_fields
+
+
+def graphql_selection(tree: FieldTree, indent: int = 0) -> str:
+    """Renders a FieldTree as a GraphQL selection set body.
+
+    Every leaf must be a scalar field, GraphQL does not allow selecting an object without its fields.
+
+    Args:
+        tree (FieldTree): The fields to select.
+        indent (int): The indentation level of the outermost fields.
+
+    Returns:
+        str: The selection, one field per line.
+    """
+    pad = "    " * indent
+    lines = []
+    for name, subtree in tree.items():
+        if subtree is None:
+            lines.append(f"{pad}{name}")
+        else:
+            lines.append(f"{pad}{name} {{")
+            lines.append(graphql_selection(subtree, indent + 1))
+            lines.append(f"{pad}}}")
+    return "\n".join(lines)
+
+
+def graphql_query(
+    header: str, field: str, fields: tuple[str, ...], root: str = "data"
+) -> str:
+    """Builds a GraphQL query that selects exactly the fields a provider reads.
+
+    Args:
+        header (str): The operation header, e.g. "query($id: Int)".
+        field (str): The root field with its arguments, e.g. "Media(id:$id, type:MANGA)".
+        fields (tuple[str, ...]): The provider's json_fields, which all start with root and the field name.
+        root (str): The response key the root field is returned under.
+
+    Returns:
+        str: The query.
+    """
+    name = field.split("(", 1)[0]
+    selection = compile_fields(fields)[root][name]
+    assert selection is not None, "The root field needs a selection"
+    return f"{header} {{\n    {field} {{\n{graphql_selection(selection, 2)}\n    }}\n}}"
+
+
+def jsonapi_sparse_fields(
+    type: str, fields: tuple[str, ...], relationships: Iterable[str] = ()
+) -> dict[str, str]:
+    """Builds the JSON:API sparse fieldset parameter for the attributes a provider reads.
+
+    Args:
+        type (str): The resource type, e.g. "manga".
+        fields (tuple[str, ...]): The provider's json_fields. Only those under data.attributes are used.
+        relationships (Iterable[str]): Relationships to keep, which have to be listed for include to work.
+
+    Returns:
+        dict[str, str]: The query parameter.
+    """
+    attributes = (compile_fields(fields).get("data") or {}).get("attributes") or {}
+    return {f"fields[{type}]": ",".join([*attributes, *relationships])}
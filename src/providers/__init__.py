@@ -1,4 +1,7 @@
-from ..abc.provider import Provider
+import importlib
+import threading
+from typing import TYPE_CHECKING, Iterator, Mapping
+
 from ..constants import (
     anilist_id_prop,
     anime_planet_prop,
@@ -8,21 +11,59 @@ from ..constants import (
     md_id_prop,
     mu_id_prop,
 )
-from .anilist import AnilistProvider
-from .anime_planet.provider import AnimePlanetProvider
-from .inkr.provider import INKRProvider
-from .kitsu import KitsuProvider
-from .mal import MALProvider
-from .md import MangadexProvider
-from .mu import MangaUpdatesProvider
+
+if TYPE_CHECKING:
+    from ..abc.provider import Provider
+
+
+class ProviderRegistry(Mapping[str, "Provider"]):
+    """Maps provider ID properties to providers.
+
+    Providers are only imported and instantiated the first time they are looked up,
+    so that e.g. BeautifulSoup is not imported unless an Anime-Planet ID is processed.
+    Each provider is only ever instantiated once, even when several threads look it up at the same time.
+    """
+
+    def __init__(self, provider_paths: dict[str, tuple[str, str]]):
+        self.provider_paths = provider_paths
+        self._instances: dict[str, "Provider"] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, prop: str) -> "Provider":
+        if (provider := self._instances.get(prop)) is not None:
+            return provider
+        with self._lock:
+            if prop not in self._instances:
+                module_name, class_name = self.provider_paths[prop]
+                module = importlib.import_module(module_name, __package__)
+                self._instances[prop] = getattr(module, class_name)()
+            return self._instances[prop]
+
+    def __contains__(self, prop: object) -> bool:
+        return prop in self.provider_paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.provider_paths)
+
+    def __len__(self) -> int:
+        return len(self.provider_paths)
+
+    def loaded(self) -> dict[str, "Provider"]:
+        """Returns the providers that have already been instantiated."""
+        with self._lock:
+            return dict(self._instances)
+
 
 # Key should be the property number that contains the provider ID.
-providers: dict[str, Provider] = {
-    mal_id_prop: MALProvider(),
-    anilist_id_prop: AnilistProvider(),
-    md_id_prop: MangadexProvider(),
-    mu_id_prop: MangaUpdatesProvider(),
-    anime_planet_prop: AnimePlanetProvider(),
-    inkr_prop: INKRProvider(),
-    kitsu_prop: KitsuProvider(),
-}
+# Value is the (relative module, class name) of the provider.
+providers = ProviderRegistry(
+    {
+        mal_id_prop: (".mal", "MALProvider"),
+        anilist_id_prop: (".anilist", "AnilistProvider"),
+        md_id_prop: (".md", "MangadexProvider"),
+        mu_id_prop: (".mu", "MangaUpdatesProvider"),
+        anime_planet_prop: (".anime_planet.provider", "AnimePlanetProvider"),
+        inkr_prop: (".inkr.provider", "INKRProvider"),
+        kitsu_prop: (".kitsu", "KitsuProvider"),
+    }
+)
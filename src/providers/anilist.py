@@ -1,3 +1,6 @@
+import datetime
+from typing import Iterator
+
 import pywikibot
 from wikidata_bot_framework import EntityPage
 
@@ -17,59 +20,59 @@ from ..constants import (
     korean_lang_item,
     language_prop,
     mal_id_prop,
-    site,
     stated_at_prop,
     title_prop,
     url_prop,
 )
-from wikidata_bot_framework import ExtraProperty
 from ..data.link import Link
 from ..data.reference import Reference
 from ..data.results import Result
 from ..data.smart_precision_time import SmartPrecisionTime
+from ..projection import graphql_query
 from ..pywikibot_stub_types import WikidataReference
+from ..retry import RetryPolicy
 
 
 class AnilistProvider(Provider):
     name = "AniList"
     prop = anilist_id_prop
+    retry_policy = RetryPolicy(retry_on_status_codes=(429,))
 
     anilist_base = "https://graphql.anilist.co"
 
-    query = """
-    query($id: Int){
-        Media(id:$id, type:MANGA){
-            idMal
-            genres,
-            tags {
-                name
-            }
-            startDate {
-                year,
-                month,
-                day
-            },
-            endDate {
-                year
-                month
-                day
-            },
-            chapters,
-            volumes,
-            countryOfOrigin,
-            hashtag,
-            isAdult,
-            externalLinks {
-                language
-                url
-                type
-            }
-            title {
-                romaji
-                english
-                native
-            }
+    # Only what get reads. Tags are left out since they are not imported (see get).
+    json_fields = (
+        "data.Media.idMal",
+        "data.Media.genres",
+        "data.Media.startDate.year",
+        "data.Media.startDate.month",
+        "data.Media.startDate.day",
+        "data.Media.endDate.year",
+        "data.Media.endDate.month",
+        "data.Media.endDate.day",
+        "data.Media.chapters",
+        "data.Media.volumes",
+        "data.Media.countryOfOrigin",
+        "data.Media.hashtag",
+        "data.Media.externalLinks.language",
+        "data.Media.externalLinks.url",
+        "data.Media.title.english",
+        "data.Media.title.native",
+    )
+
+    query = graphql_query("query($id: Int)", "Media(id:$id, type:MANGA)", json_fields)
+
+    feed_query = """
+query($page: Int) {
+    Page(page:$page, perPage:50) {
+        pageInfo {
+            hasNextPage
         }
+        media(type:MANGA, sort:UPDATED_AT_DESC) {
+            id
+            updatedAt
+        }
+    }
 }
     """
 
@@ -143,8 +146,6 @@ class AnilistProvider(Provider):
             self.anilist_base,
             json={"query": self.query, "variables": {"id": id}},
             not_found_on_request_404=True,
-            retry_on_status_codes=(429,),
-            use_exponential_backoff=True,
         )
         if r is None or json is None:
             return Result()
@@ -152,9 +153,7 @@ class AnilistProvider(Provider):
         data = json["data"]["Media"]
         result = Result()
         if data["idMal"] is not None:
-            claim = pywikibot.Claim(site, mal_id_prop)
-            claim.setTarget(str(data["idMal"]))
-            result.other_properties[mal_id_prop].append(ExtraProperty(claim=claim))
+            result.add_value(mal_id_prop, str(data["idMal"]))
         if data["genres"] is not None:
             for genre in data["genres"]:
                 if genre in self.genre_mapping:
@@ -183,20 +182,12 @@ class AnilistProvider(Provider):
         if data["countryOfOrigin"] is not None:
             if data["countryOfOrigin"] in self.country_code_mapping:
                 country, language = self.country_code_mapping[data["countryOfOrigin"]]
-                country_claim = pywikibot.Claim(site, country_prop)
-                country_claim.setTarget(country)
-                result.other_properties[country_prop].append(
-                    ExtraProperty(claim=country_claim)
-                )
-                language_claim = pywikibot.Claim(site, language_prop)
-                language_claim.setTarget(language)
-                result.other_properties[language_prop].append(
-                    ExtraProperty(claim=language_claim, skip_if_conflicting_exists=True)
+                result.add_value(country_prop, country)
+                result.add_value(
+                    language_prop, language, skip_if_conflicting_exists=True
                 )
         if data["hashtag"] is not None:
-            claim = pywikibot.Claim(site, hashtag_prop)
-            claim.setTarget(data["hashtag"].lstrip("#").strip())
-            result.other_properties[hashtag_prop].append(ExtraProperty(claim=claim))
+            result.add_value(hashtag_prop, data["hashtag"].lstrip("#").strip())
         if data["externalLinks"] is not None:
             for item in data["externalLinks"]:
                 if item["language"] in self.external_links_language_mapping:
@@ -214,14 +205,10 @@ class AnilistProvider(Provider):
             english = data["title"]["english"]
             native = data["title"]["native"]
             if english is not None:
-                english_claim = pywikibot.Claim(site, title_prop)
-                english_claim.setTarget(
-                    pywikibot.WbMonolingualText(english.strip(), "en")
-                )
-                result.other_properties[title_prop].append(
-                    ExtraProperty(
-                        claim=english_claim, skip_if_conflicting_language_exists=True
-                    )
+                result.add_value(
+                    title_prop,
+                    pywikibot.WbMonolingualText(english.strip(), "en"),
+                    skip_if_conflicting_language_exists=True,
                 )
             if (
                 native is not None
@@ -235,18 +222,32 @@ class AnilistProvider(Provider):
                     for key, value in self.language_to_iso_639_1.items()
                     if value == lang_item
                 )
-                native_claim = pywikibot.Claim(site, title_prop)
-                native_claim.setTarget(
-                    pywikibot.WbMonolingualText(native.strip(), lang_key)
-                )
-                native_claim.setRank("preferred")
-                result.other_properties[title_prop].append(
-                    ExtraProperty(
-                        claim=native_claim, skip_if_conflicting_language_exists=True
-                    )
+                result.add_value(
+                    title_prop,
+                    pywikibot.WbMonolingualText(native.strip(), lang_key),
+                    "preferred",
+                    skip_if_conflicting_language_exists=True,
                 )
         return result
 
+    def iter_changed_ids(self, since: datetime.datetime) -> Iterator[str]:
+        since_timestamp = since.timestamp()
+        for page in range(1, self.max_feed_pages + 1):
+            data = self.request_feed_page(
+                "POST",
+                self.anilist_base,
+                json={"query": self.feed_query, "variables": {"page": page}},
+            )
+            media_page = data["data"]["Page"]
+            for media in media_page["media"]:
+                # Newest first, so everything after the first older change is older too.
+                if (media["updatedAt"] or 0) < since_timestamp:
+                    return
+                yield str(media["id"])
+            if not media_page["pageInfo"]["hasNextPage"]:
+                return
+        raise self.feed_truncated()
+
     def compute_similar_reference(
         self, potential_ref: WikidataReference, id: str
     ) -> bool:
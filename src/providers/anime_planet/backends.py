@@ -0,0 +1,97 @@
+import dataclasses
+import functools
+import importlib.util
+from typing import Callable, Union
+
+
+@dataclasses.dataclass
+class PageFragments:
+    """The raw pieces of an Anime-Planet manga page that the parser reads."""
+
+    vol_and_chap: str = ""
+    magazine_hrefs: list[str] = dataclasses.field(default_factory=list)
+    years: str = ""
+    tag_hrefs: list[str] = dataclasses.field(default_factory=list)
+
+
+def _has_class_xpath(class_name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def extract_with_lxml(html: Union[str, bytes]) -> PageFragments:
+    """Extracts the page fragments using lxml's C HTML parser and XPath."""
+    from lxml import html as lxml_html
+
+    root = lxml_html.document_fromstring(html)
+    section = root.get_element_by_id("siteContainer").find(".//section")
+    assert section is not None
+    vol_and_chap_info, magazine_info, year_info = section.findall("div")[:3]
+    fragments = PageFragments(vol_and_chap=vol_and_chap_info.text_content())
+    for a in magazine_info.findall("a"):
+        if (href := a.get("href")) is not None:
+            fragments.magazine_hrefs.append(href)
+    fragments.years = year_info.xpath(f".//span[{_has_class_xpath('iconYear')}]")[
+        0
+    ].text_content()
+    tags = root.xpath(f"//div[{_has_class_xpath('tags')}]")[0]
+    for a in tags.iter("a"):
+        if (href := a.get("href")) is not None:
+            fragments.tag_hrefs.append(href)
+    return fragments
+
+
+def _needed_subtrees(name: str, attrs: Union[dict, None] = None) -> bool:
+    if attrs is None:
+        # Newer BeautifulSoup versions only pass the tag name, so we can't filter.
+        return True
+    if attrs.get("id") == "siteContainer":
+        return True
+    classes = attrs.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return name == "div" and "tags" in classes
+
+
+def extract_with_bs4(
+    html: Union[str, bytes], only_needed_subtrees: bool = True
+) -> PageFragments:
+    """Extracts the page fragments using BeautifulSoup's pure-Python html.parser.
+
+    Unless only_needed_subtrees is False, only the #siteContainer and .tags subtrees are built.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(
+        html,
+        "html.parser",
+        parse_only=SoupStrainer(_needed_subtrees) if only_needed_subtrees else None,
+    )
+    section = soup.find(attrs={"id": "siteContainer"}).find("section")
+    assert section is not None
+    vol_and_chap_info, magazine_info, year_info = section.find_all(
+        "div", recursive=False
+    )[:3]
+    fragments = PageFragments(vol_and_chap=vol_and_chap_info.text)
+    for a in magazine_info.find_all("a", recursive=False):
+        if (href := a.get("href")) is not None:
+            fragments.magazine_hrefs.append(href)
+    fragments.years = year_info.find("span", {"class": "iconYear"}).text
+    for a in soup.find("div", {"class": "tags"}).find_all("a", recursive=True):
+        if (href := a.get("href")) is not None:
+            fragments.tag_hrefs.append(href)
+    return fragments
+
+
+backends: dict[str, Callable[[Union[str, bytes]], PageFragments]] = {
+    "lxml": extract_with_lxml,
+    "bs4": extract_with_bs4,
+    # The full-tree parse the scraper originally used. Kept as the reference for equivalence checks.
+    "bs4-full": functools.partial(extract_with_bs4, only_needed_subtrees=False),
+}
+
+
+def default_backend() -> str:
+    """Returns lxml if it is installed, falling back to BeautifulSoup otherwise."""
+    if importlib.util.find_spec("lxml") is None:
+        return "bs4"
+    return "lxml"
@@ -1,11 +1,12 @@
 import re
-from typing import List
-
-from bs4 import BeautifulSoup, Tag
+from typing import Union
 
+from ... import parse_pool
 from ...exceptions import NotFoundException
 from ...constants import anime_planet_prop
+from ...streaming import IncrementalExtractor, stream_into
 from . import ParserResult
+from .backends import backends, default_backend
 
 base_url = "https://www.anime-planet.com/manga"
 magazine_url_regex = re.compile(r"/manga/magazines/([a-z-]+)", re.IGNORECASE)
@@ -13,7 +14,55 @@ tag_url_regex = re.compile(r"/manga/tags/([a-z-]+)", re.IGNORECASE)
 ap_new_url_regex = re.compile(rf"{base_url}/([a-z\d-]+)", re.IGNORECASE)
 
 
-def get_data(manga_id: str) -> ParserResult:
+class PageExtractor(IncrementalExtractor):
+    """Buffers a manga page until the parts parse_page reads have been received.
+
+    That is the #siteContainer section, followed by the .tags div up to its closing tag.
+    """
+
+    site_container_regex = re.compile(
+        r"""\bid\s*=\s*["']?siteContainer(?![\w-])""", re.IGNORECASE
+    )
+    section_end_regex = re.compile(r"</section\s*>", re.IGNORECASE)
+    tags_div_regex = re.compile(
+        r"""<div\b[^>]*\bclass\s*=\s*["'][^"']*(?<![\w-])tags(?![\w-])""",
+        re.IGNORECASE,
+    )
+    div_tag_regex = re.compile(r"<(/?)div\b", re.IGNORECASE)
+    # Don't trust a match this close to the end of the buffer, it may continue in the next chunk.
+    margin = 1024
+
+    def __init__(self):
+        self.html = ""
+        self.position = 0
+        self.stages = [
+            self.site_container_regex,
+            self.section_end_regex,
+            self.tags_div_regex,
+        ]
+        self.div_depth = 0
+
+    def feed(self, chunk: str) -> None:
+        self.html += chunk
+        while self.stages:
+            match = self.stages[0].search(self.html, self.position)
+            if match is None or match.end() > len(self.html) - self.margin:
+                return
+            self.stages.pop(0)
+            # The tags div itself is counted below.
+            self.position = match.start() if not self.stages else match.end()
+        for match in self.div_tag_regex.finditer(self.html, self.position):
+            if match.end() > len(self.html) - len("</div>"):
+                return
+            self.div_depth += -1 if match.group(1) else 1
+            self.position = match.end()
+            if self.div_depth == 0:
+                self.html = self.html[: self.position] + ">"
+                self.done = True
+                return
+
+
+def get_data(manga_id: str, backend: Union[str, None] = None) -> ParserResult:
     from .. import providers
 
     r, _ = providers[anime_planet_prop].do_request_with_retries(
@@ -23,36 +72,54 @@ def get_data(manga_id: str) -> ParserResult:
         return_json=False,
         use_spoofed_user_agent=True,
         on_other_bad_status_code="ignore",
+        stream=True,
     )
     if r is None:
         return ParserResult()
     if r.status_code == 404:
+        r.close()
         data = {"ap_id": manga_id, "history": []}
         if r.history:
             data["history"] = [h.url for h in r.history]
         raise NotFoundException(data)
-    else:
+    elif not r.ok:
+        r.close()
         r.raise_for_status()
     new_manga_id = ap_new_url_regex.search(r.url).group(1)
     result = ParserResult(new_id=new_manga_id)
     for item in r.history:
         result.previous_ids.append(ap_new_url_regex.search(item.url).group(1))
-    soup = BeautifulSoup(r.text, "html.parser")
-    section = soup.find(attrs={"id": "siteContainer"}).find("section")
-    assert section is not None
-    divs: List[Tag] = section.find_all("div", recursive=False)
-    (
-        vol_and_chap_info,
-        magazine_info,
-        year_info,
-    ) = (
-        divs[0],
-        divs[1],
-        divs[2],
+    extractor = stream_into(r, PageExtractor(), "Anime-Planet")
+    return parse_pool.run(
+        parse_page,
+        extractor.html,
+        result,
+        backend,
+        size=len(extractor.html),
     )
 
+
+def parse_page(
+    html: Union[str, bytes],
+    result: Union[ParserResult, None] = None,
+    backend: Union[str, None] = None,
+) -> ParserResult:
+    """Parses a manga page into a ParserResult.
+
+    Args:
+        html (Union[str, bytes]): The page HTML.
+        result (Union[ParserResult, None]): The result to fill in. A new one is made if not given.
+        backend (Union[str, None]): The name of the HTML backend in backends.backends. Defaults to lxml if available.
+
+    Returns:
+        ParserResult: The filled in result.
+    """
+    if result is None:
+        result = ParserResult()
+    fragments = backends[backend or default_backend()](html)
+
     # Volumes and chapters
-    vol_and_chap_string = vol_and_chap_info.text.strip()
+    vol_and_chap_string = fragments.vol_and_chap.strip()
     if "; " in vol_and_chap_string:
         # Contains both volume and chapter in that order
         parts = vol_and_chap_string.split("; ")
@@ -69,13 +136,12 @@ def get_data(manga_id: str) -> ParserResult:
                 result.chapters = int(value)
 
     # Magazine external IDs
-    for a in magazine_info.find_all("a", recursive=False):
-        a: Tag
-        if match := magazine_url_regex.search(a["href"]):
+    for href in fragments.magazine_hrefs:
+        if match := magazine_url_regex.search(href):
             result.magazine.append(match.group(1))
 
     # Parsing start/end year
-    years_string = year_info.find("span", {"class": "iconYear"}).text.strip()
+    years_string = fragments.years.strip()
     if " - " in years_string:
         # Has a range, so the first part is the start year.
         start_year, _, end_year = years_string.partition(" - ")
@@ -88,9 +154,8 @@ def get_data(manga_id: str) -> ParserResult:
         result.start_year = result.end_year = int(years_string)
 
     # Parsing tags
-    for a in soup.find("div", {"class": "tags"}).find_all("a", recursive=True):
-        a: Tag
-        if match := tag_url_regex.search(a["href"]):
+    for href in fragments.tag_hrefs:
+        if match := tag_url_regex.search(href):
             result.tags.append(match.group(1))
 
     return result
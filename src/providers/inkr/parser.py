@@ -1,10 +1,17 @@
 import re
 
 from ...constants import inkr_prop
+from ...streaming import RegexExtractor, stream_into
 from . import ParserResult
 
 base_url = "https://comics.inkr.com/title"
 genre_url_regex = re.compile(r"https://comics\.inkr\.com/genre/(\d+)", re.IGNORECASE)
+# The title's structured data, which only links the title's own genres (unlike e.g. the recommendations).
+structured_data_start_regex = re.compile(
+    r"""<script\b[^>]*\btype\s*=\s*["']?application/ld\+json["']?[^>]*>""",
+    re.IGNORECASE,
+)
+script_end_regex = re.compile(r"</script\s*>", re.IGNORECASE)
 
 
 def get_data(id: str) -> ParserResult:
@@ -16,9 +23,14 @@ def get_data(id: str) -> ParserResult:
         return_json=False,
         on_retry_limit_exhaused_exception="raise",
         not_found_on_request_404=True,
+        stream=True,
     )
     if r is None:
         return ParserResult()
-    text = r.text
-    genres = genre_url_regex.findall(text)
-    return ParserResult(genres=genres)
+    # The rest of the page is skipped once the genre links in the structured data have been read.
+    extractor = stream_into(
+        r,
+        RegexExtractor(genre_url_regex, structured_data_start_regex, script_end_regex),
+        "INKR",
+    )
+    return ParserResult(genres=extractor.matches)
@@ -1,6 +1,6 @@
 import datetime
-import os
 import re
+from typing import Iterator
 
 import pywikibot
 from requests.exceptions import (
@@ -8,7 +8,6 @@ from requests.exceptions import (
     JSONDecodeError as JSONDecodeError,
 )
 from requests.models import Response as Response
-from wikidata_bot_framework import EntityPage, Output
 
 from ..abc.provider import Provider
 from ..constants import (
@@ -22,7 +21,10 @@ from ..constants import (
 from ..data.reference import Reference
 from ..data.results import Result
 from ..exceptions import NotFoundException
+from ..post_process import ItemWalker, PostProcessContext
+from ..projection import jsonapi_sparse_fields
 from ..pywikibot_stub_types import WikidataReference
+from .kitsu_auth import KitsuTokenManager
 
 
 class KitsuProvider(Provider):
@@ -30,6 +32,13 @@ class KitsuProvider(Provider):
     prop = kitsu_prop
 
     kitsu_base = "https://kitsu.io/api/edge"
+    json_fields = (
+        "data.attributes.startDate",
+        "data.attributes.endDate",
+        "data.attributes.volumeCount",
+        "data.attributes.chapterCount",
+        "included.id",
+    )
 
     genre_mapping = {
         3: Genres.school,
@@ -84,32 +93,24 @@ class KitsuProvider(Provider):
         246: Genres.isekai,
     }
 
-    @staticmethod
-    def get_kitsu_headers() -> dict[str, str]:
-        headers = {}
-        current_timestamp = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()
-        if (access_token := os.environ.get("KITSU_ACCESS_TOKEN", None)) and int(
-            os.environ.get("KITSU_EXPIRES_AT", 0)
-        ) > current_timestamp:
-            headers["Authorization"] = f"Bearer {access_token}"
-        return headers
+    def __init__(self):
+        self.token_manager = KitsuTokenManager()
+
+    def get_kitsu_headers(self) -> dict[str, str]:
+        return self.token_manager.headers()
 
     def do_request_with_retries(self, *args, **kwargs):
-        headers = self.get_kitsu_headers()
-        if headers and "headers" not in kwargs:
-            kwargs["headers"] = headers
-        else:
-            kwargs["headers"].update(headers)
+        kwargs["headers"] = {**kwargs.get("headers", {}), **self.get_kitsu_headers()}
         return super().do_request_with_retries(*args, **kwargs)
 
     def string_id_to_int_id(self, id: str) -> int | None:
         url = f"{self.kitsu_base}/manga"
+        # Only the ID is needed, which JSON:API always returns.
         params = {
-            "fields[categories]": "id",
+            "fields[manga]": "slug",
             "filter[slug]": id,
             "page[limit]": 1,
             "page[offset]": 0,
-            "include": "categories",
         }
         r, data = self.do_request_with_retries("GET", url, params=params)
         if r is None or data is None:
@@ -129,7 +130,11 @@ class KitsuProvider(Provider):
         if non_numeric:
             id = str(self.string_id_to_int_id(id))
         url = f"{self.kitsu_base}/manga/{id}"
-        params = {"fields[categories]": "id", "include": "categories"}
+        params = {
+            **jsonapi_sparse_fields("manga", self.json_fields, ("categories",)),
+            "fields[categories]": "id",
+            "include": "categories",
+        }
         r, data = self.do_request_with_retries(
             "GET", url, params=params, not_found_on_request_404=True
         )
@@ -163,66 +168,61 @@ class KitsuProvider(Provider):
             result.chapters = attributes["chapterCount"]
         return result
 
-    def post_process_hook(self, output: Output, item: EntityPage) -> bool:
-        edited = False
-        id_mapping: dict[str, int] = {}
-        for claim in item.claims.get(self.prop, []).copy():
-            claim: pywikibot.Claim
-            if not claim.getTarget().isnumeric():
-                existing_int_id = id_mapping.get(claim.getTarget(), None)
-                if existing_int_id is None:
-                    int_id = self.string_id_to_int_id(claim.getTarget())
-                    if int_id is None:
-                        raise NotFoundException()
-                    else:
-                        id_mapping[claim.getTarget()] = int_id
-                else:
-                    int_id = existing_int_id
-                for other_claims in item.claims.get(
-                    self.prop, []
-                ).copy():  # We're checking that the int ID doesn't already exist in another claim for the property
-                    if other_claims.getTarget() == str(int_id):
-                        item.claims[self.prop].remove(claim)
-                        edited = True
-                        break
-                else:
-                    claim.setTarget(str(int_id))
-                    edited = True
-        for claim_list in item.claims.values():
-            for claim in claim_list:
-                for reference_set in claim.sources:
-                    for (
-                        reference_property_id,
-                        reference_claim_list,
-                    ) in reference_set.items():
-                        if reference_property_id == self.prop:
-                            for reference_claim in reference_claim_list.copy():
-                                reference_claim: pywikibot.Claim
-                                if not reference_claim.getTarget().isnumeric():
-                                    existing_int_id = id_mapping.get(
-                                        reference_claim.getTarget(), None
-                                    )
-                                    if existing_int_id is None:
-                                        int_id = self.string_id_to_int_id(
-                                            reference_claim.getTarget()
-                                        )
-                                        if int_id is None:
-                                            raise NotFoundException()
-                                        else:
-                                            id_mapping[
-                                                reference_claim.getTarget()
-                                            ] = int_id
-                                    else:
-                                        int_id = existing_int_id
-                                    for other_claims in reference_claim_list:
-                                        if other_claims.getTarget() == str(int_id):
-                                            reference_claim_list.remove(reference_claim)
-                                            edited = True
-                                            break
-                                    else:
-                                        reference_claim.setTarget(str(int_id))
-                                        edited = True
+    def iter_changed_ids(self, since: datetime.datetime) -> Iterator[str]:
+        limit = 20
+        params = {
+            "sort": "-updatedAt",
+            "fields[manga]": "slug,updatedAt",
+            "page[limit]": limit,
+            "page[offset]": 0,
+        }
+        for _ in range(self.max_feed_pages):
+            data = self.request_feed_page(
+                "GET", f"{self.kitsu_base}/manga", params=params
+            )
+            for manga in data["data"]:
+                attributes = manga["attributes"]
+                if datetime.datetime.fromisoformat(attributes["updatedAt"]) < since:
+                    return
+                yield manga["id"]
+                # Some items still use the slug as their Kitsu ID.
+                if attributes["slug"]:
+                    yield attributes["slug"]
+            if len(data["data"]) < limit:
+                return
+            params["page[offset]"] += limit
+        raise self.feed_truncated()
 
+    def register_post_process_handlers(self, walker: ItemWalker) -> None:
+        walker.add_claim_handler(self.prop, self.replace_slug_ids)
+        walker.add_reference_handler(self.prop, self.replace_slug_ids)
+
+    def replace_slug_ids(
+        self, prop: str, claims: list[pywikibot.Claim], context: PostProcessContext
+    ) -> bool:
+        """Replaces slug IDs with numeric IDs, removing claims whose numeric ID is already present.
+
+        Used both for the item's Kitsu ID claims and for the Kitsu ID claims inside references.
+        """
+        edited = False
+        # Shared between all the claim lists of an item so each slug is only looked up once.
+        id_mapping: dict[str, int] = context.state.setdefault("kitsu_id_mapping", {})
+        for claim in claims.copy():
+            slug = claim.getTarget()
+            if slug.isnumeric():
+                continue
+            if slug not in id_mapping:
+                int_id = self.string_id_to_int_id(slug)
+                if int_id is None:
+                    raise NotFoundException()
+                id_mapping[slug] = int_id
+            int_id = str(id_mapping[slug])
+            # We're checking that the int ID doesn't already exist in another claim for the property
+            if any(other_claim.getTarget() == int_id for other_claim in claims):
+                claims.remove(claim)
+            else:
+                claim.setTarget(int_id)
+            edited = True
         return edited
 
     def compute_similar_reference(
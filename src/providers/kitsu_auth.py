@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Union
+
+import requests
+
+from ..constants import get_state_path
+
+default_token_url = "https://kitsu.io/api/oauth/token"
+
+
+def request_token(
+    payload: dict[str, str], token_url: Union[str, None] = None
+) -> requests.Response:
+    """Requests a token from Kitsu's OAuth endpoint.
+
+    Args:
+        payload (dict[str, str]): The grant, e.g. {"grant_type": "refresh_token", "refresh_token": ...}.
+        token_url (Union[str, None]): The token endpoint. Defaults to $KITSU_TOKEN_URL or Kitsu's endpoint.
+
+    Returns:
+        requests.Response: The response. Its JSON has access_token, refresh_token, created_at and expires_in.
+    """
+    return requests.post(
+        token_url or os.environ.get("KITSU_TOKEN_URL", default_token_url),
+        json=payload,
+        timeout=30,
+    )
+
+
+class KitsuTokenManager:
+    """Keeps a Kitsu access token valid for the whole run.
+
+    The token is refreshed with the refresh-token grant on a background timer shortly before it expires,
+    and the Authorization header is built once per token instead of once per request.
+    Tokens are read from $KITSU_ACCESS_TOKEN, $KITSU_REFRESH_TOKEN and $KITSU_EXPIRES_AT unless given.
+    Kitsu rotates the refresh token on every refresh, so the latest tokens are saved in the state directory
+    and used instead of the configured ones when they are newer.
+    """
+
+    # Refresh this many seconds before the token expires.
+    refresh_margin: float = 24 * 60 * 60
+    # Never schedule a refresh sooner than this, e.g. for tokens that live shorter than the margin.
+    min_refresh_delay: float = 60
+    # Wait this long before trying again after a failed refresh.
+    retry_delay: float = 5 * 60
+
+    def __init__(
+        self,
+        access_token: Union[str, None] = None,
+        refresh_token: Union[str, None] = None,
+        expires_at: Union[float, None] = None,
+        token_url: Union[str, None] = None,
+        state_path: Union[str, None] = None,
+    ):
+        self.access_token = access_token or os.environ.get("KITSU_ACCESS_TOKEN", "")
+        self.refresh_token = refresh_token or os.environ.get("KITSU_REFRESH_TOKEN", "")
+        self.expires_at = (
+            expires_at
+            if expires_at is not None
+            else float(os.environ.get("KITSU_EXPIRES_AT", "0"))
+        )
+        self.token_url = token_url
+        self.state_path = state_path or get_state_path("kitsu_token.json")
+        self._load_state()
+        self._lock = threading.Lock()
+        self._timer: Union[threading.Timer, None] = None
+        self._headers: dict[str, str] = {}
+        self._next_inline_refresh = 0.0
+        self._set_headers()
+        self._schedule_refresh()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state: dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return
+        if state["expires_at"] > self.expires_at:
+            self.access_token = state["access_token"]
+            self.refresh_token = state["refresh_token"]
+            self.expires_at = state["expires_at"]
+
+    def _save_state(self):
+        # Written to a temporary file first so that a crash can't leave a truncated file behind.
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "access_token": self.access_token,
+                    "refresh_token": self.refresh_token,
+                    "expires_at": self.expires_at,
+                },
+                f,
+            )
+        os.replace(temp_path, self.state_path)
+
+    def _set_headers(self):
+        if self.access_token:
+            self._headers = {"Authorization": f"Bearer {self.access_token}"}
+        else:
+            self._headers = {}
+
+    def headers(self) -> dict[str, str]:
+        """Gets the headers to authenticate a request with.
+
+        Returns:
+            dict[str, str]: The Authorization header, or no headers if there is no valid token.
+        """
+        now = time.time()
+        if self.expires_at <= now:
+            # The background refresh didn't happen in time (or keeps failing), so try in line,
+            # at most once per retry_delay.
+            if not self.refresh_token or now < self._next_inline_refresh:
+                return {}
+            self._next_inline_refresh = now + self.retry_delay
+            try:
+                if not self.refresh():
+                    return {}
+            except requests.RequestException:
+                return {}
+        return self._headers.copy()
+
+    def refresh(self) -> bool:
+        """Exchanges the refresh token for a new access token.
+
+        Returns:
+            bool: Whether a new token was obtained, which is not the case for an error or malformed response.
+        """
+        with self._lock:
+            r = request_token(
+                {"grant_type": "refresh_token", "refresh_token": self.refresh_token},
+                self.token_url,
+            )
+            if not r.ok:
+                return False
+            try:
+                data: dict[str, Any] = r.json()
+                access_token = data["access_token"]
+                expires_at = float(data["created_at"]) + float(data["expires_in"])
+            except (ValueError, KeyError, TypeError):
+                return False
+            self.access_token = access_token
+            self.refresh_token = data.get("refresh_token", self.refresh_token)
+            self.expires_at = expires_at
+            self._set_headers()
+            self._save_state()
+        self._schedule_refresh()
+        return True
+
+    def _schedule_refresh(self, delay: Union[float, None] = None):
+        if not self.refresh_token:
+            return
+        if delay is None:
+            remaining = self.expires_at - time.time()
+            # Tokens that live shorter than the margin are refreshed halfway through instead.
+            delay = max(
+                remaining - min(self.refresh_margin, remaining / 2),
+                self.min_refresh_delay,
+            )
+        self.stop()
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            refreshed = self.refresh()
+        except Exception as e:
+            from wikidata_bot_framework import report_exception
+
+            report_exception(e)
+            refreshed = False
+        if not refreshed:
+            self._schedule_refresh(self.retry_delay)
+
+    def stop(self):
+        """Cancels the pending background refresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
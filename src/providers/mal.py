@@ -18,11 +18,28 @@ from ..data.link import Link
 from ..data.reference import Reference
 from ..data.results import Result
 from ..pywikibot_stub_types import WikidataReference
+from ..retry import RetryPolicy
 
 
 class MALProvider(Provider):
     name: str = "MyAnimeList"
     prop = mal_id_prop
+    # Jikan times out (408) while it refreshes its copy of MAL, which can take a while.
+    retry_policy = RetryPolicy(
+        attempts=6, base_delay=10, deadline=5 * 60, retry_on_status_codes=(408,)
+    )
+    # Jikan has no way to select fields. /full is still needed since the plain endpoint lacks the
+    # external links, so the rest is dropped after decoding instead.
+    json_fields = (
+        "data.chapters",
+        "data.volumes",
+        "data.published",
+        "data.genres.mal_id",
+        "data.explicit_genres.mal_id",
+        "data.themes.mal_id",
+        "data.demographics.mal_id",
+        "data.external",
+    )
 
     jikan_base = "https://api.jikan.moe/v4"
 
@@ -92,10 +109,8 @@ class MALProvider(Provider):
         r, json = self.do_request_with_retries(
             "GET",
             f"{self.jikan_base}/manga/{id}/full",
-            retries=5,
-            sleep_time_between_retries=10,
-            retry_on_status_codes=(408,),
             not_found_on_request_404=True,
+            json_fields=self.json_fields,
         )
         if r is None or json is None:
             return Result()
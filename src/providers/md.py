@@ -1,5 +1,6 @@
+import datetime
 import re
-from typing import Union
+from typing import Iterator, Union
 
 import pywikibot
 import requests
@@ -33,17 +34,37 @@ from ..constants import (
     url_prop,
 )
 from ..exceptions import AbortError
+from ..negative_cache import get_negative_cache
 from ..data.bad_data import BadDataReport
-from wikidata_bot_framework import ExtraProperty, ExtraReference
+from wikidata_bot_framework import EntityPage, ExtraProperty, ExtraReference
 from ..data.link import Link
 from ..data.reference import Reference
 from ..data.results import Result
 from ..pywikibot_stub_types import WikidataReference
+from ..retry import RetryPolicy
+
+
+# Negative cache namespace for the legacy numeric MangaUpdates IDs that MangaDex still links to.
+mu_legacy_namespace = "mu-legacy"
+mu_legacy_url = "https://www.mangaupdates.com/series.html?id={}"
 
 
 class MangadexProvider(Provider):
     name = "MangaDex"
     prop = md_id_prop
+    # For resolving legacy MangaUpdates IDs on the MangaUpdates website.
+    mu_retry_policy = RetryPolicy(retry_on_status_codes=(429,))
+    # The MangaDex API has no sparse fieldsets, so the unused attributes (descriptions, alt titles, ...)
+    # are dropped after decoding instead.
+    json_fields = (
+        "data.attributes.tags.id",
+        "data.attributes.publicationDemographic",
+        "data.attributes.originalLanguage",
+        "data.attributes.lastVolume",
+        "data.attributes.lastChapter",
+        "data.attributes.contentRating",
+        "data.attributes.links",
+    )
 
     md_base = "https://api.mangadex.org"
 
@@ -99,9 +120,34 @@ class MangadexProvider(Provider):
     mu_new_url_regex = re.compile(r"https://www\.mangaupdates\.com/series/([0-9a-z]+)")
     bw_regex_md = re.compile(r"series/(\d+)")
 
-    def get(self, id: str, _) -> Result:
+    def has_resolved_mu_id(self, item: EntityPage, legacy_id: str) -> bool:
+        """Checks whether an item already has the MangaUpdates ID a legacy ID resolves to.
+
+        A resolved ID is added with the legacy URL in its reference, which is what is looked for.
+
+        Args:
+            item (EntityPage): The item.
+            legacy_id (str): The legacy (numeric) MangaUpdates ID.
+
+        Returns:
+            bool: Whether the item has it.
+        """
+        legacy_url = mu_legacy_url.format(legacy_id)
+        for claim in item.claims.get(mu_id_prop, []):
+            if claim.getRank() == "deprecated":
+                continue
+            for source in claim.getSources():
+                for url_claim in source.get(url_prop, []):
+                    if url_claim.getTarget() == legacy_url:
+                        return True
+        return False
+
+    def get(self, id: str, wikidata_item: EntityPage) -> Result:
         r, json = self.do_request_with_retries(
-            "GET", f"{self.md_base}/manga/{id}", not_found_on_request_404=True
+            "GET",
+            f"{self.md_base}/manga/{id}",
+            not_found_on_request_404=True,
+            json_fields=self.json_fields,
         )
         if r is None or json is None:
             return Result()
@@ -121,16 +167,8 @@ class MangadexProvider(Provider):
         if data["originalLanguage"]:
             if data["originalLanguage"] in self.country_code_mapping:
                 country, language = self.country_code_mapping[data["originalLanguage"]]
-                country_claim = pywikibot.Claim(site, country_prop)
-                country_claim.setTarget(country)
-                result.other_properties[country_prop].append(
-                    ExtraProperty(claim=country_claim, skip_if_conflicting_exists=True)
-                )
-                language_claim = pywikibot.Claim(site, language_prop)
-                language_claim.setTarget(language)
-                result.other_properties[language_prop].append(
-                    ExtraProperty(claim=language_claim)
-                )
+                result.add_value(country_prop, country, skip_if_conflicting_exists=True)
+                result.add_value(language_prop, language)
         if data["lastVolume"]:
             try:
                 result.volumes = int(data["lastVolume"])
@@ -149,46 +187,43 @@ class MangadexProvider(Provider):
         if data["links"]:
             mal_id = data["links"].get("mal", None)
             if mal_id:
-                claim = pywikibot.Claim(site, mal_id_prop)
-                claim.setTarget(str(mal_id))
-                result.other_properties[mal_id_prop].append(ExtraProperty(claim=claim))
+                result.add_value(mal_id_prop, str(mal_id))
             anilist_id = data["links"].get("al", None)
             if anilist_id:
-                claim = pywikibot.Claim(site, anilist_id_prop)
-                claim.setTarget(str(anilist_id))
-                result.other_properties[anilist_id_prop].append(
-                    ExtraProperty(claim=claim)
-                )
+                result.add_value(anilist_id_prop, str(anilist_id))
             bw_id = data["links"].get("bw", "")
             if match := self.bw_regex_md.search(bw_id):
-                claim = pywikibot.Claim(site, bookwalker_prop)
-                claim.setTarget(match.group(1))
-                result.other_properties[bookwalker_prop].append(
-                    ExtraProperty(claim=claim)
-                )
+                result.add_value(bookwalker_prop, match.group(1))
             ebj_url = data["links"].get("ebj", "")
             if match := ebookjapan_regex.search(ebj_url):
-                claim = pywikibot.Claim(site, ebookjapan_prop)
-                claim.setTarget(match.group(1))
-                result.other_properties[ebookjapan_prop].append(
-                    ExtraProperty(claim=claim)
-                )
+                result.add_value(ebookjapan_prop, match.group(1))
             ap_id = data["links"].get("ap", None)
             if ap_id:
-                claim = pywikibot.Claim(site, anime_planet_prop)
-                extra_prop = ExtraProperty(claim=claim)
-                result.other_properties[anime_planet_prop].append(extra_prop)
-                claim.setTarget(ap_id)
+                result.add_value(anime_planet_prop, ap_id)
             mu_id: Union[str, None] = data["links"].get("mu", None)
-            if mu_id:
+            # Resolving a legacy (numeric) ID scrapes the MangaUpdates website, which is only worth it
+            # if the item doesn't have the ID it resolves to yet.
+            if mu_id and not (
+                mu_id.isnumeric() and self.has_resolved_mu_id(wikidata_item, mu_id)
+            ):
                 if mu_id.isnumeric():
                     try:
+                        if get_negative_cache().contains(mu_legacy_namespace, mu_id):
+                            result.bad_data_reports.append(
+                                BadDataReport(
+                                    self,
+                                    id,
+                                    "MangaUpdates ID not found",
+                                    {"mu_id": mu_id, "history": []},
+                                )
+                            )
+                            raise AbortError()
                         r, _ = self.do_request_with_retries(
                             "GET",
                             f"https://www.mangaupdates.com/series.html?id={mu_id}",
                             on_other_bad_status_code="ignore",
                             on_retry_limit_exhaused_exception="raise",
-                            retry_on_status_codes=(429,),
+                            retry_policy=self.mu_retry_policy,
                             return_json=False,
                         )
                         if r is None:
@@ -201,6 +236,7 @@ class MangadexProvider(Provider):
                             if r.history:
                                 data["history"] = [h.url for h in r.history]
                             result.bad_data_reports.append(report)
+                            get_negative_cache().add(mu_legacy_namespace, mu_id)
                             raise AbortError()
                         else:
                             r.raise_for_status()
@@ -220,13 +256,11 @@ class MangadexProvider(Provider):
                                 mu_check_claim.setTarget(mu_item)
                                 extra_ref.match_property_values[
                                     stated_at_prop
-                                ] = extra_ref.new_reference_props[
-                                    stated_at_prop
-                                ] = mu_check_claim
-                                url_ref_claim = pywikibot.Claim(site, url_prop)
-                                url_ref_claim.setTarget(
-                                    f"https://www.mangaupdates.com/series.html?id={mu_id}"
+                                ] = extra_ref.new_reference_props[stated_at_prop] = (
+                                    mu_check_claim
                                 )
+                                url_ref_claim = pywikibot.Claim(site, url_prop)
+                                url_ref_claim.setTarget(mu_legacy_url.format(mu_id))
                                 extra_ref.new_reference_props[url_prop] = url_ref_claim
                                 extra_prop.extra_references.append(extra_ref)
                                 result.other_properties[mu_id_prop].append(extra_prop)
@@ -238,15 +272,10 @@ class MangadexProvider(Provider):
                     ):
                         pass
                 else:
-                    claim = pywikibot.Claim(site, mu_id_prop)
-                    claim.setTarget(mu_id)
-                    extra_prop = ExtraProperty(claim=claim)
-                    result.other_properties[mu_id_prop].append(extra_prop)
+                    result.add_value(mu_id_prop, mu_id)
             kitsu_link = data["links"].get("kt", None)
             if kitsu_link:
-                claim = pywikibot.Claim(site, kitsu_prop)
-                claim.setTarget(kitsu_link)
-                result.other_properties[kitsu_prop].append(ExtraProperty(claim=claim))
+                result.add_value(kitsu_prop, kitsu_link)
             raw_link = data["links"].get("raw", None)
             engtl_link = data["links"].get("engtl", None)
             if raw_link:
@@ -255,6 +284,31 @@ class MangadexProvider(Provider):
                 result.links.append(Link(engtl_link, language=english_lang_item))
         return result
 
+    def iter_changed_ids(self, since: datetime.datetime) -> Iterator[str]:
+        limit = 100
+        params = {
+            "updatedAtSince": since.strftime("%Y-%m-%dT%H:%M:%S"),
+            "order[updatedAt]": "asc",
+            # Only safe, suggestive and erotica titles are listed unless asked otherwise.
+            "contentRating[]": ["safe", "suggestive", "erotica", "pornographic"],
+            "limit": limit,
+            "offset": 0,
+        }
+        for _ in range(self.max_feed_pages):
+            data = self.request_feed_page("GET", f"{self.md_base}/manga", params=params)
+            for manga in data["data"]:
+                yield manga["id"]
+            if len(data["data"]) < limit:
+                return
+            last_updated_at = data["data"][-1]["attributes"]["updatedAt"]
+            params["offset"] += limit
+            if params["offset"] + limit > 10000:
+                # MangaDex doesn't page past 10000 results, so continue from the last change seen instead.
+                params["updatedAtSince"] = last_updated_at[:19]
+                params["offset"] = 0
+        # The feed is read oldest first, so the next poll can continue from the last change read.
+        raise self.feed_truncated(datetime.datetime.fromisoformat(last_updated_at))
+
     def compute_similar_reference(
         self, potential_ref: WikidataReference, id: str
     ) -> bool:
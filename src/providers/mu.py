@@ -1,4 +1,6 @@
+import datetime
 import re
+from typing import Iterator
 
 import pywikibot
 
@@ -14,11 +16,13 @@ from ..constants import (
 from ..data.reference import Reference
 from ..data.results import Result
 from ..pywikibot_stub_types import WikidataReference
+from ..retry import RetryPolicy
 
 
 class MangaUpdatesProvider(Provider):
     name = "MangaUpdates"
     prop = mu_id_prop
+    retry_policy = RetryPolicy(retry_on_status_codes=(429,))
 
     mu_base = "https://api.mangaupdates.com/v1"
 
@@ -60,13 +64,22 @@ class MangaUpdatesProvider(Provider):
     def base36_to_int(s: str):
         return int(s, 36)
 
+    @staticmethod
+    def int_to_base36(n: int) -> str:
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+        s = ""
+        while True:
+            n, remainder = divmod(n, 36)
+            s = digits[remainder] + s
+            if n == 0:
+                return s
+
     def get(self, id: str, _) -> Result:
         id_num = self.base36_to_int(id)
         r, data = self.do_request_with_retries(
             "GET",
             f"{self.mu_base}/series/{id_num}",
             not_found_on_request_404=True,
-            retry_on_status_codes=(429,),
         )
         res = Result()
         if r is None or data is None:
@@ -86,6 +99,31 @@ class MangaUpdatesProvider(Provider):
             res.start_date = pywikibot.WbTime(year=int(year))
         return res
 
+    def iter_changed_ids(self, since: datetime.datetime) -> Iterator[str]:
+        # New chapter releases are what change the series data this bot imports, so the release feed
+        # is used. It only has day precision, which the overlap with the last poll makes up for.
+        per_page = 100
+        body = {
+            "start_date": since.strftime("%Y-%m-%d"),
+            "orderby": "date",
+            "asc": "desc",
+            "perpage": per_page,
+            "include_metadata": True,
+        }
+        for page in range(1, self.max_feed_pages + 1):
+            data = self.request_feed_page(
+                "POST", f"{self.mu_base}/releases/search", json={**body, "page": page}
+            )
+            for release in data["results"]:
+                series_id = (
+                    release.get("metadata", {}).get("series", {}).get("series_id")
+                )
+                if series_id:
+                    yield self.int_to_base36(series_id)
+            if not data["results"] or page * per_page >= data["total_hits"]:
+                return
+        raise self.feed_truncated()
+
     def compute_similar_reference(
         self, potential_ref: WikidataReference, id: str
     ) -> bool:
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, Union
+
+from . import metrics
+from .constants import get_bad_import_page, get_site, get_state_path
+
+if TYPE_CHECKING:
+    from .data.bad_data import BadDataReport
+
+_schema = """
+CREATE TABLE IF NOT EXISTS reports (
+    qid TEXT NOT NULL,
+    provider_name TEXT NOT NULL,
+    provider_prop TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    data TEXT,
+    report_time TEXT NOT NULL,
+    posted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (qid, provider_prop, provider_id, message)
+)
+"""
+
+
+class BadDataReportSink:
+    """Queues bad data reports in a local SQLite database and posts them to the wiki in batches.
+
+    A report is only ever queued once per (item, provider, provider ID, message), so reports that come
+    up again on later runs are not filed again. Pending reports are appended to the bad import page
+    once flush_interval has passed since the last post, and when the sink is closed.
+    """
+
+    flush_interval: float = 15 * 60
+    # Caps the size of each edit (and of what is rendered for it) when a lot of reports have piled up.
+    max_reports_per_edit: int = 500
+
+    def __init__(
+        self, path: Union[str, None] = None, flush_interval: Union[float, None] = None
+    ):
+        self.connection = sqlite3.connect(
+            path or get_state_path("bad_data_reports.sqlite3"),
+            check_same_thread=False,
+        )
+        self.connection.execute(_schema)
+        self.connection.commit()
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, qid: str, reports: Iterable["BadDataReport"]) -> int:
+        """Queues reports for an item.
+
+        Args:
+            qid (str): The item the reports are about.
+            reports (Iterable[BadDataReport]): The reports.
+
+        Returns:
+            int: The number of reports that were not already queued or posted.
+        """
+        rows = [
+            (
+                qid,
+                report.provider.name,
+                report.provider.prop,
+                report.provider_id,
+                report.message,
+                json.dumps(report.data, indent=4) if report.data else None,
+                report.report_time.isoformat(),
+            )
+            for report in reports
+        ]
+        with self._lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO reports "
+                "(qid, provider_name, provider_prop, provider_id, message, data, report_time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.connection.commit()
+            added = self.connection.total_changes - before
+        metrics.increment("bad_data.reports_added", added)
+        metrics.increment("bad_data.reports_deduplicated", len(rows) - added)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            try:
+                self.flush()
+            except Exception as e:
+                # The reports stay queued and are retried on the next flush.
+                from wikidata_bot_framework import report_exception
+
+                report_exception(e)
+        return added
+
+    def render(
+        self, rows: list[tuple[int, str, str, str, str, str, Union[str, None]]]
+    ) -> str:
+        text = ""
+        current_qid = current_provider = None
+        report_num = 0
+        for _, qid, provider_name, provider_prop, provider_id, message, data in rows:
+            if qid != current_qid:
+                text += "== {{Q|%s}} ==\n" % qid
+                current_qid, current_provider = qid, None
+            if provider_name != current_provider:
+                text += f"=== {provider_name} ===\n"
+                current_provider = provider_name
+                report_num = 0
+            report_num += 1
+            text += f"==== Report {report_num} ====\n"
+            text += "'''Statement''': {{statement|%s|%s|%s}}\n" % (
+                qid,
+                provider_prop,
+                provider_id,
+            )
+            text += "'''Message''': %s\n" % message
+            if data:
+                text += (
+                    """'''Data''': <syntaxhighlight lang="json">\n%s\n</syntaxhighlight>\n"""
+                    % data
+                )
+        return text
+
+    def flush(self) -> int:
+        """Appends all pending reports to the bad import page, max_reports_per_edit per edit.
+
+        Returns:
+            int: The number of reports posted.
+        """
+        posted = 0
+        with self._lock:
+            self._last_flush = time.monotonic()
+            while rows := self.connection.execute(
+                "SELECT rowid, qid, provider_name, provider_prop, provider_id, message, data "
+                "FROM reports WHERE posted = 0 ORDER BY qid, provider_name, rowid LIMIT ?",
+                (self.max_reports_per_edit,),
+            ).fetchall():
+                # Only the new sections are sent, instead of re-uploading the whole page.
+                get_site().editpage(
+                    get_bad_import_page(),
+                    summary=f"Adding {len(rows)} new bad data report(s)",
+                    bot=True,
+                    appendtext="\n" + self.render(rows),
+                )
+                self.connection.executemany(
+                    "UPDATE reports SET posted = 1 WHERE rowid = ?",
+                    [(row[0],) for row in rows],
+                )
+                self.connection.commit()
+                posted += len(rows)
+                metrics.increment("bad_data.reports_posted", len(rows))
+        return posted
+
+    def close(self) -> None:
+        """Posts the pending reports and closes the database."""
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
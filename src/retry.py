@@ -0,0 +1,122 @@
+import contextlib
+import dataclasses
+import random
+import time
+from contextvars import ContextVar
+from typing import Iterator, Union
+
+import requests
+
+from . import metrics
+
+# When the item being processed must be done by (time.monotonic()), see item_budget.
+_item_deadline: ContextVar[Union[float, None]] = ContextVar(
+    "item_deadline", default=None
+)
+
+
+@contextlib.contextmanager
+def item_budget(seconds: Union[float, None]) -> Iterator[None]:
+    """Stops retrying requests made inside the block once it has run for the given time.
+
+    Args:
+        seconds (Union[float, None]): The budget. None means no limit.
+    """
+    token = _item_deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _item_deadline.reset(token)
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a request.
+
+    Delays grow exponentially from base_delay up to max_delay, and each delay is picked at random
+    between 0 and that value (full jitter) so that clients retrying together spread out.
+    The policy only computes delays, so the same policy works for blocking and asyncio callers.
+    """
+
+    # The total number of attempts, including the first one.
+    attempts: int = 4
+    base_delay: float = 5
+    max_delay: float = 60
+    # How long all the attempts of one request may take, in seconds. None means no limit.
+    deadline: Union[float, None] = 120
+    # The timeout for each attempt, passed to requests unless the caller gives one.
+    timeout: float = 30
+    retry_on_status_codes: tuple[int, ...] = ()
+    # Status code classes to retry, e.g. 5 for 5xx.
+    retry_on_status_code_range: tuple[int, ...] = (5,)
+    retry_on_exceptions: tuple[type[Exception], ...] = (
+        requests.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+        requests.exceptions.ContentDecodingError,
+        requests.Timeout,
+    )
+    retry_on_json_exceptions: tuple[type[Exception], ...] = (requests.JSONDecodeError,)
+
+    def should_retry_status(self, status: int) -> bool:
+        return (
+            status in self.retry_on_status_codes
+            or status // 100 in self.retry_on_status_code_range
+        )
+
+    def should_retry_exception(self, exception: BaseException) -> bool:
+        return isinstance(exception, self.retry_on_exceptions)
+
+    def backoff(self, retry: int) -> float:
+        """Gets the delay before a retry.
+
+        Args:
+            retry (int): Which retry this is, starting from 1.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        )
+
+    def start(self) -> "RetryState":
+        return RetryState(self)
+
+
+class RetryState:
+    """The retries left for one request."""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.attempt = 1
+        self.deadline = (
+            None if policy.deadline is None else time.monotonic() + policy.deadline
+        )
+
+    def timeout(self) -> float:
+        """Gets the timeout for the next attempt, shortened to fit the deadlines."""
+        timeout = self.policy.timeout
+        now = time.monotonic()
+        for deadline in (self.deadline, _item_deadline.get()):
+            if deadline is not None:
+                timeout = min(timeout, max(deadline - now, 1))
+        return timeout
+
+    def next_delay(self) -> Union[float, None]:
+        """Gets how long to wait before the next attempt.
+
+        Returns:
+            Union[float, None]: The delay in seconds, or None if the request should not be retried,
+                because the attempts ran out or the next attempt would start after a deadline.
+        """
+        if self.attempt >= self.policy.attempts:
+            return None
+        delay = self.policy.backoff(self.attempt)
+        resume_at = time.monotonic() + delay
+        for deadline in (self.deadline, _item_deadline.get()):
+            if deadline is not None and resume_at >= deadline:
+                metrics.increment("retry.deadline_exceeded")
+                return None
+        self.attempt += 1
+        metrics.increment("retry.retries")
+        return delay
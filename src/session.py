@@ -0,0 +1,101 @@
+import datetime
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, MutableMapping
+
+import requests
+from requests_cache import BaseCache, CachedSession
+from requests_cache.backends.base import DictStorage
+
+from . import metrics
+
+
+def _entry_size(key: str, value: Any) -> int:
+    if isinstance(value, str):
+        return len(key) + len(value)
+    # Headers and the response object itself are small next to the body, so they are not counted.
+    return len(key) + len(getattr(value, "_content", None) or b"")
+
+
+class ByteBudgetStorage(DictStorage):
+    """In-memory cache storage that evicts the least recently used entries once it holds more than max_bytes."""
+
+    def __init__(self, max_bytes: int, *args, **kwargs):
+        self.max_bytes = max_bytes
+        self.sizes: OrderedDict[str, int] = OrderedDict()
+        self.total_bytes = 0
+        self._lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+
+    def __getitem__(self, key):
+        with self._lock:
+            item = super().__getitem__(key)
+            self.sizes.move_to_end(key)
+            return item
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self.data:
+                del self[key]
+            super().__setitem__(key, value)
+            self.sizes[key] = _entry_size(key, value)
+            self.total_bytes += self.sizes[key]
+            while self.total_bytes > self.max_bytes and len(self.sizes) > 1:
+                del self[next(iter(self.sizes))]
+                metrics.increment("session_cache.evicted")
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+            self.total_bytes -= self.sizes.pop(key)
+
+
+class BoundedMemoryCache(BaseCache):
+    """The requests-cache memory backend, capped at max_bytes of response bodies."""
+
+    def __init__(self, max_bytes: int, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = ByteBudgetStorage(max_bytes)
+        # Redirect aliases are only a pair of keys each, so a small share of the budget is plenty.
+        self.redirects = ByteBudgetStorage(max_bytes // 64)
+
+
+class RatelimitSession(requests.Session):
+    ratelimit_by_host: dict[str, float] = {"graphql.anilist.co": 2, "api.jikan.moe": 1}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_request_by_host: dict[str, float] = {}
+        self._ratelimit_lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *args,
+        headers: MutableMapping[str, str] | None = None,
+        **kwargs,
+    ):
+        parsed = urllib.parse.urlparse(url)
+        host = parsed.hostname
+        if host in self.ratelimit_by_host:
+            # Each request reserves the next free slot for its host under the lock and then sleeps until it,
+            # so that threads sharing the session still respect the limit.
+            with self._ratelimit_lock:
+                now = datetime.datetime.now().timestamp()
+                slot = now
+                if host in self.last_request_by_host:
+                    slot = max(
+                        now,
+                        self.last_request_by_host[host] + self.ratelimit_by_host[host],
+                    )
+                self.last_request_by_host[host] = slot
+            if slot > now:
+                time.sleep(slot - now)
+        return super().request(method, url, *args, headers=headers, **kwargs)
+
+
+class RatelimitCachedSession(CachedSession, RatelimitSession):
+    pass
@@ -0,0 +1,120 @@
+import re
+from abc import ABC, abstractmethod
+from typing import TypeVar, Union
+
+from requests import Response
+
+from . import metrics
+
+
+class IncrementalExtractor(ABC):
+    """Consumes a page chunk by chunk and signals once it has everything it needs."""
+
+    done: bool = False
+
+    @abstractmethod
+    def feed(self, chunk: str) -> None:
+        """Feeds the next decoded chunk of the page.
+
+        Args:
+            chunk (str): The chunk.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Called once no more chunks will be fed, either because the extractor is done or the body ended."""
+
+
+class RegexExtractor(IncrementalExtractor):
+    """Collects the first group of every match of a regex inside a block of the page.
+
+    A block starts after a match of start and ends at the next match of end. The extractor is done once it
+    has read a block with at least one match in it, blocks without any are skipped. If the page has no
+    such block, every match in the whole page is collected instead.
+    """
+
+    # Don't trust a marker this close to the end of the page read so far, it may continue in the next chunk.
+    margin = 256
+
+    def __init__(self, regex: re.Pattern, start: re.Pattern, end: re.Pattern):
+        self.regex = regex
+        self.start = start
+        self.end = end
+        self.matches: list[str] = []
+        self.text = ""
+        # Where to search for the next marker, and where the current block starts (None if not in one).
+        self.position = 0
+        self.block_start: Union[int, None] = None
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        self._scan(len(self.text) - self.margin)
+
+    def _scan(self, limit: int) -> None:
+        while not self.done:
+            marker = self.end if self.block_start is not None else self.start
+            match = marker.search(self.text, self.position)
+            if match is None:
+                # Markers are shorter than the margin, so none can start before it anymore.
+                self.position = max(self.position, limit)
+                return
+            if match.end() > limit:
+                return
+            self.position = match.end()
+            if self.block_start is None:
+                self.block_start = match.end()
+                continue
+            matches = self.regex.findall(self.text, self.block_start, match.start())
+            self.block_start = None
+            if matches:
+                self.matches = matches
+                self.done = True
+                return
+
+    def close(self) -> None:
+        self._scan(len(self.text))
+        if not self.done:
+            self.matches = self.regex.findall(self.text)
+        self.text = ""
+
+
+_Extractor = TypeVar("_Extractor", bound=IncrementalExtractor)
+
+
+def stream_into(
+    r: Response, extractor: _Extractor, name: str, chunk_size: int = 16384
+) -> _Extractor:
+    """Feeds a streamed (stream=True) response into an extractor, closing the connection as soon as it is done.
+
+    The bytes read and, when the response has a Content-Length, the bytes skipped by stopping early
+    are recorded under the "streaming.{name}" metrics.
+
+    Args:
+        r (Response): The streamed response.
+        extractor (IncrementalExtractor): The extractor to feed.
+        name (str): The name to record metrics under, usually the provider name.
+        chunk_size (int): The size of the chunks to read.
+
+    Returns:
+        IncrementalExtractor: The extractor.
+    """
+    if r.encoding is None:
+        r.encoding = "utf-8"
+    try:
+        for chunk in r.iter_content(chunk_size=chunk_size, decode_unicode=True):
+            extractor.feed(chunk)
+            if extractor.done:
+                break
+    finally:
+        bytes_read = r.raw.tell()
+        r.close()
+        extractor.close()
+    metrics.increment(f"streaming.{name}.bytes_read", bytes_read)
+    content_length = r.headers.get("Content-Length", "")
+    if extractor.done and content_length.isnumeric():
+        metrics.increment(
+            f"streaming.{name}.bytes_saved", max(int(content_length) - bytes_read, 0)
+        )
+    if extractor.done:
+        metrics.increment(f"streaming.{name}.early_closes")
+    return extractor
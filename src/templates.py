@@ -0,0 +1,154 @@
+import functools
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Callable
+
+import pywikibot
+
+from .constants import get_site
+
+# How many value templates are kept, the least recently used are dropped first.
+max_value_templates = 4096
+# Whether claims are copied from templates. Off builds every claim from scratch, for comparing the two.
+enabled = True
+
+
+class ClaimTemplate:
+    """A claim that is never handed out itself, only copied.
+
+    A copy shares the template's target, which pywikibot never changes in place (setTarget replaces it),
+    and gets its own rank, qualifiers and sources, so it can be edited like any other claim.
+    """
+
+    __slots__ = ("prop", "target", "_attributes", "_value_class")
+
+    def __init__(self, claim: pywikibot.Claim):
+        self.prop: str = claim.getID()  # type: ignore
+        self.target = claim.target
+        # Reading the type looks it up once, copies then get it with the other attributes.
+        self._value_class = claim.types[claim.type]
+        self._attributes = tuple(claim.__dict__.items())
+
+    def copy(self, target: object = None, rank: str = "normal") -> pywikibot.Claim:
+        """Makes a claim from the template.
+
+        Args:
+            target (object): The target, if the template doesn't have one or it should be replaced.
+            rank (str): The rank of the claim.
+
+        Returns:
+            pywikibot.Claim: The claim.
+        """
+        claim = object.__new__(pywikibot.Claim)
+        # Set one by one and in the original order, so that the instance dict stays key-sharing. Updating
+        # it in one go makes it more than twice the size.
+        for name, value in self._attributes:
+            setattr(claim, name, value)
+        claim.sources = []
+        claim.qualifiers = OrderedDict()
+        claim.rank = rank
+        if target is not None:
+            if not isinstance(target, self._value_class):
+                raise ValueError(f"{target} is not type {self._value_class}.")
+            claim.target = target
+        return claim
+
+
+_value_templates: OrderedDict[Hashable, ClaimTemplate] = OrderedDict()
+_value_templates_lock = threading.Lock()
+
+
+@functools.cache
+def property_template(
+    prop: str, is_reference: bool = False, is_qualifier: bool = False
+) -> ClaimTemplate:
+    """Gets the template for claims of a property, without a target."""
+    return ClaimTemplate(
+        pywikibot.Claim(
+            get_site(), prop, is_reference=is_reference, is_qualifier=is_qualifier
+        )
+    )
+
+
+def value_template(
+    prop: str,
+    key: Hashable,
+    build_target: Callable[[], object],
+    is_reference: bool = False,
+) -> ClaimTemplate:
+    """Gets the template for claims of a property with a given value.
+
+    The key stands in for the value, so that a value that was seen before doesn't have to be built again.
+
+    Args:
+        prop (str): The property.
+        key (Hashable): A key that is equal exactly for equal values, made of plain values.
+        build_target (Callable[[], object]): Builds the target, only called if there is no template yet.
+        is_reference (bool): Whether the claims are used in references.
+
+    Returns:
+        ClaimTemplate: The template.
+    """
+    cache_key = (prop, key, is_reference)
+    with _value_templates_lock:
+        template = _value_templates.get(cache_key)
+        if template is not None:
+            _value_templates.move_to_end(cache_key)
+            return template
+    claim = property_template(prop, is_reference).copy()
+    claim.setTarget(build_target())
+    template = ClaimTemplate(claim)
+    with _value_templates_lock:
+        _value_templates[cache_key] = template
+        if len(_value_templates) > max_value_templates:
+            _value_templates.popitem(last=False)
+    return template
+
+
+def make_claim(
+    prop: str,
+    target: object,
+    rank: str = "normal",
+    is_reference: bool = False,
+    is_qualifier: bool = False,
+) -> pywikibot.Claim:
+    """Makes a claim, the cheap equivalent of creating a pywikibot.Claim and calling setTarget.
+
+    Args:
+        prop (str): The property.
+        target (object): The target.
+        rank (str): The rank of the claim.
+        is_reference (bool): Whether the claim is used in a reference.
+        is_qualifier (bool): Whether the claim is used as a qualifier.
+
+    Returns:
+        pywikibot.Claim: The claim.
+    """
+    if not enabled:
+        claim = pywikibot.Claim(
+            get_site(),
+            prop,
+            is_reference=is_reference,
+            is_qualifier=is_qualifier,
+            rank=rank,
+        )
+        claim.setTarget(target)
+        return claim
+    if isinstance(target, pywikibot.ItemPage) and not is_qualifier:
+        # Items (genres, countries, languages, provider items) are the values that repeat the most.
+        template = value_template(prop, target.getID(), lambda: target, is_reference)
+        return template.copy(rank=rank)
+    return property_template(prop, is_reference, is_qualifier).copy(target, rank)
+
+
+def shared_target(
+    prop: str, key: Hashable, build_target: Callable[[], object]
+) -> object:
+    """Gets the target for a value given as plain data, only building it for values that weren't seen yet.
+
+    See value_template for the arguments.
+    """
+    if not enabled:
+        return build_target()
+    return value_template(prop, key, build_target).target
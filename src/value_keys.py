@@ -0,0 +1,129 @@
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Union
+
+import pywikibot
+
+from .constants import stated_at_prop, url_prop
+
+if TYPE_CHECKING:
+    from wikidata_bot_framework import EntityPage
+
+    from .abc.provider import Provider
+
+# The part of an archive.org URL that the framework strips from URL claims, which changes their value.
+_archive_url_marker = "web.archive.org/web/"
+
+
+def value_key(value: object) -> Union[Hashable, None]:
+    """Gets a hashable key for a claim target, equal for two targets exactly when the framework would
+    consider them the same value.
+
+    This is much cheaper than comparing toWikibase() dicts, and lets values be looked up in sets.
+
+    Args:
+        value (object): The target.
+
+    Returns:
+        Union[Hashable, None]: The key, or None for targets without one (e.g. coordinates or no value).
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, pywikibot.ItemPage):
+        return ("item", value.getID())
+    if isinstance(value, pywikibot.WbTime):
+        # The same fields as toWikibase, without formatting the timestamp.
+        return (
+            "time",
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+            value.precision,
+            value.before,
+            value.after,
+            value.timezone,
+            value.calendarmodel,
+        )
+    if isinstance(value, pywikibot.WbQuantity):
+        # str keeps trailing zeros, like the Wikibase representation does.
+        return (
+            "quantity",
+            str(value.amount),
+            None if value.upperBound is None else str(value.upperBound),
+            None if value.lowerBound is None else str(value.lowerBound),
+            value.unit,
+        )
+    if isinstance(value, pywikibot.WbMonolingualText):
+        return ("text", value.language, value.text)
+    return None
+
+
+class ReferencedValues:
+    """The values an item already has, and which of them a provider ID already fully references.
+
+    A provider's value whose claim exists with the same rank and a reference that already has everything
+    make_reference would add can't change the item, so it can be dropped before its claim and reference
+    are built. This mirrors the framework: the first claim with an equal target is the one it matches,
+    and the first compatible reference on it is the one it would merge into.
+    """
+
+    def __init__(self, item: "EntityPage"):
+        self.first_claims: dict[tuple[str, Hashable], pywikibot.Claim] = {}
+        for prop, claims in item.claims.items():
+            for claim in claims:
+                key = value_key(claim.getTarget())
+                if key is not None:
+                    self.first_claims.setdefault((prop, key), claim)
+        self._referenced: dict[tuple[str, str], set[tuple[str, Hashable]]] = {}
+
+    def referenced_by(
+        self, provider: "Provider", provider_id: str
+    ) -> set[tuple[str, Hashable]]:
+        """Gets the (property, value key) pairs whose claim is fully referenced by a provider ID."""
+        cache_key = (provider.prop, provider_id)
+        if cache_key not in self._referenced:
+            required = {stated_at_prop, url_prop, provider.prop}
+            referenced = set()
+            for key, claim in self.first_claims.items():
+                for source in claim.getSources():
+                    try:
+                        compatible = provider.compute_similar_reference(
+                            source, provider_id
+                        )
+                    except NotImplementedError:
+                        break
+                    if compatible:
+                        if required <= source.keys():
+                            referenced.add(key)
+                        break
+            self._referenced[cache_key] = referenced
+        return self._referenced[cache_key]
+
+    def is_referenced(
+        self,
+        provider: "Provider",
+        provider_id: str,
+        prop: str,
+        value: object,
+        rank: str = "normal",
+    ) -> bool:
+        """Checks whether adding a value with a provider's reference would leave the item unchanged.
+
+        Args:
+            provider (Provider): The provider.
+            provider_id (str): The provider ID the reference would be for.
+            prop (str): The property of the value.
+            value (object): The value.
+            rank (str): The rank the value would have.
+
+        Returns:
+            bool: Whether the value can be dropped.
+        """
+        if isinstance(value, str) and _archive_url_marker in value:
+            return False
+        key = value_key(value)
+        if key is None or (prop, key) not in self.referenced_by(provider, provider_id):
+            return False
+        return self.first_claims[prop, key].getRank() == rank
@@ -0,0 +1,4 @@
+from .memory import MemoryWorkQueue
+from .sqlite import SQLiteWorkQueue
+
+__all__ = ["MemoryWorkQueue", "SQLiteWorkQueue"]
@@ -0,0 +1,74 @@
+import heapq
+import itertools
+import threading
+from typing import Union
+
+from ..abc.work_queue import WorkQueue
+from ..data.work_item import WorkItem
+
+
+class MemoryWorkQueue(WorkQueue):
+    """A work queue that only lives as long as the process, for tests and one-off runs."""
+
+    def __init__(self):
+        # Maps pending items to their (priority, sequence). Heap entries that no longer match are stale.
+        self._pending: dict[str, tuple[int, int]] = {}
+        self._heap: list[tuple[int, int, str]] = []
+        self._claimed: dict[str, WorkItem] = {}
+        # Items queued again while they were being processed, with their priority.
+        self._requeued: dict[str, int] = {}
+        self._attempts: dict[str, int] = {}
+        self.failed: dict[str, str] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _push(self, qid: str, priority: int) -> None:
+        sequence = next(self._sequence)
+        self._pending[qid] = (priority, sequence)
+        heapq.heappush(self._heap, (-priority, sequence, qid))
+        self._condition.notify()
+
+    def put(self, qid: str, priority: int = 0) -> None:
+        with self._condition:
+            if qid in self._claimed:
+                self._requeued[qid] = max(self._requeued.get(qid, priority), priority)
+            elif qid not in self._pending or self._pending[qid][0] < priority:
+                self.failed.pop(qid, None)
+                self._push(qid, priority)
+
+    def get(self, timeout: Union[float, None] = None) -> Union[WorkItem, None]:
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pending, timeout):
+                return None
+            while True:
+                negative_priority, sequence, qid = heapq.heappop(self._heap)
+                if self._pending.get(qid) == (-negative_priority, sequence):
+                    break
+            del self._pending[qid]
+            self._attempts[qid] = self._attempts.get(qid, 0) + 1
+            work_item = WorkItem(qid, -negative_priority, self._attempts[qid])
+            self._claimed[qid] = work_item
+            return work_item
+
+    def ack(self, work_item: WorkItem) -> None:
+        with self._condition:
+            self._claimed.pop(work_item.qid, None)
+            self._attempts.pop(work_item.qid, None)
+            if work_item.qid in self._requeued:
+                self._push(work_item.qid, self._requeued.pop(work_item.qid))
+
+    def fail(self, work_item: WorkItem, error: str) -> None:
+        with self._condition:
+            self._claimed.pop(work_item.qid, None)
+            if work_item.qid in self._requeued:
+                self._attempts.pop(work_item.qid, None)
+                self._push(work_item.qid, self._requeued.pop(work_item.qid))
+            elif work_item.attempts >= self.max_attempts:
+                self._attempts.pop(work_item.qid, None)
+                self.failed[work_item.qid] = error
+            else:
+                self._push(work_item.qid, work_item.priority)
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._pending)
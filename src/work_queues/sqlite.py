@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+from typing import Union
+
+from ..abc.work_queue import WorkQueue
+from ..constants import get_state_path
+from ..data.work_item import WorkItem
+
+_schema = """
+CREATE TABLE IF NOT EXISTS work_queue (
+    qid TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    -- pending, claimed or failed
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    -- Set when the item is queued again while it is being processed.
+    requeued INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS work_queue_next ON work_queue (state, priority DESC, enqueued_at);
+"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """A work queue kept in a SQLite database, so that it survives restarts and other processes can add to it.
+
+    Only one process should consume a queue at a time: items left claimed by a previous process
+    (e.g. one that crashed) are put back in the queue when it is opened.
+    """
+
+    # How often to check for items queued by other processes while waiting.
+    poll_interval: float = 1
+
+    def __init__(self, path: Union[str, None] = None, recover_claimed: bool = True):
+        self.connection = sqlite3.connect(
+            path or get_state_path("work_queue.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30,
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_schema)
+        if recover_claimed:
+            self.connection.execute(
+                "UPDATE work_queue SET state = 'pending', requeued = 0 WHERE state = 'claimed'"
+            )
+        self._condition = threading.Condition()
+
+    def put(self, qid: str, priority: int = 0) -> None:
+        with self._condition:
+            # The right-hand sides all see the row as it was before the update.
+            self.connection.execute(
+                """
+                INSERT INTO work_queue (qid, priority, enqueued_at) VALUES (?, ?, ?)
+                ON CONFLICT (qid) DO UPDATE SET
+                    priority = MAX(priority, excluded.priority),
+                    requeued = state = 'claimed',
+                    state = CASE WHEN state = 'claimed' THEN 'claimed' ELSE 'pending' END,
+                    attempts = CASE WHEN state = 'failed' THEN 0 ELSE attempts END
+                """,
+                (qid, priority, time.time()),
+            )
+            self._condition.notify()
+
+    def _claim(self) -> Union[WorkItem, None]:
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.connection.execute(
+                "SELECT qid, priority, attempts FROM work_queue WHERE state = 'pending' "
+                "ORDER BY priority DESC, enqueued_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE work_queue SET state = 'claimed', attempts = attempts + 1 WHERE qid = ?",
+                    (row[0],),
+                )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        qid, priority, attempts = row
+        return WorkItem(qid, priority, attempts + 1)
+
+    def get(self, timeout: Union[float, None] = None) -> Union[WorkItem, None]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while (work_item := self._claim()) is None:
+                wait = self.poll_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return None
+                self._condition.wait(wait)
+            return work_item
+
+    def ack(self, work_item: WorkItem) -> None:
+        with self._condition:
+            self.connection.execute(
+                "DELETE FROM work_queue WHERE qid = ? AND NOT requeued",
+                (work_item.qid,),
+            )
+            self.connection.execute(
+                "UPDATE work_queue SET state = 'pending', requeued = 0, attempts = 0 WHERE qid = ?",
+                (work_item.qid,),
+            )
+            self._condition.notify()
+
+    def fail(self, work_item: WorkItem, error: str) -> None:
+        with self._condition:
+            self.connection.execute(
+                """
+                UPDATE work_queue SET
+                    state = CASE
+                        WHEN requeued OR attempts < ? THEN 'pending'
+                        ELSE 'failed'
+                    END,
+                    attempts = CASE WHEN requeued THEN 0 ELSE attempts END,
+                    requeued = 0,
+                    last_error = ?
+                WHERE qid = ?
+                """,
+                (self.max_attempts, error, work_item.qid),
+            )
+            self._condition.notify()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM work_queue WHERE state = 'pending'"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
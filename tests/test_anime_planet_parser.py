@@ -0,0 +1,72 @@
+import unittest
+from pathlib import Path
+
+from src.providers.anime_planet import ParserResult
+from src.providers.anime_planet.backends import backends
+from src.providers.anime_planet.parser import PageExtractor, parse_page
+
+fixtures = Path(__file__).parent / "fixtures" / "anime_planet"
+reference_backend = "bs4-full"
+
+expected_results = {
+    "complete-series.html": ParserResult(
+        start_year=2003,
+        end_year=2022,
+        volumes=15,
+        chapters=117,
+        magazine=["dengeki-daioh"],
+        tags=["comedy", "slice-of-life", "seinen", "family-life"],
+    ),
+    "ongoing-chapters-only.html": ParserResult(
+        start_year=2010,
+        magazine=["naver-webtoon"],
+        tags=["action", "adventure", "fantasy", "manhwa", "webtoons", "full-color"],
+    ),
+    "oneshot-several-magazines.html": ParserResult(
+        start_year=2021,
+        end_year=2021,
+        volumes=1,
+        chapters=1,
+        magazine=["shonen-jump-plus", "weekly-shonen-jump"],
+        tags=["drama", "shounen", "one-shot", "artists"],
+    ),
+}
+
+
+class ParsePageTest(unittest.TestCase):
+    def test_fixtures_have_expected_results(self):
+        self.assertEqual(
+            sorted(path.name for path in fixtures.glob("*.html")),
+            sorted(expected_results),
+        )
+
+    def test_backends_match_reference(self):
+        for name, expected in expected_results.items():
+            html = (fixtures / name).read_text(encoding="utf-8")
+            reference = parse_page(html, backend=reference_backend)
+            self.assertEqual(reference, expected, name)
+            for backend in backends:
+                with self.subTest(page=name, backend=backend):
+                    self.assertEqual(parse_page(html, backend=backend), reference)
+
+    def test_streamed_page_matches_reference(self):
+        for name, expected in expected_results.items():
+            html = (fixtures / name).read_text(encoding="utf-8")
+            for chunk_size in (64, 1024, 16384):
+                extractor = PageExtractor()
+                for start in range(0, len(html), chunk_size):
+                    extractor.feed(html[start : start + chunk_size])
+                    if extractor.done:
+                        break
+                extractor.close()
+                for backend in backends:
+                    with self.subTest(
+                        page=name, chunk_size=chunk_size, backend=backend
+                    ):
+                        self.assertEqual(
+                            parse_page(extractor.html, backend=backend), expected
+                        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from src.constants import mal_id_prop, md_id_prop, mu_id_prop
+from src.crosswalk import CrosswalkIndex, SortedRecords, encode_id
+
+
+class EncodeIdTest(unittest.TestCase):
+    def test_numeric_ids_are_their_value(self):
+        self.assertEqual(encode_id(mal_id_prop, "12345"), 12345)
+
+    def test_base36_ids_are_their_value(self):
+        self.assertEqual(encode_id(mu_id_prop, "z"), 35)
+        self.assertEqual(encode_id(mu_id_prop, "10"), 36)
+
+    def test_kinds_of_keys_do_not_collide(self):
+        hashed = encode_id(md_id_prop, "a1c7c817-4e59-43b7-9365-09675a149a6f")
+        self.assertNotEqual(hashed, encode_id(mal_id_prop, str(hashed)))
+        # Numbers too big for 63 bits are hashed instead, and can't take the place of a small number.
+        huge = str(2**64)
+        self.assertGreaterEqual(encode_id(mal_id_prop, huge), 1 << 63)
+        self.assertNotEqual(
+            encode_id(mal_id_prop, huge), encode_id(mal_id_prop, str(2**64 % 2**63))
+        )
+        # Slugs are hashed, and never equal the key of a number.
+        slug = encode_id(mal_id_prop, "one-piece")
+        self.assertGreaterEqual(slug, 1 << 63)
+        self.assertNotEqual(slug, encode_id(mal_id_prop, "1"))
+
+
+class SortedRecordsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "records.bin")
+
+    def open(self, records):
+        SortedRecords.write(self.path, records)
+        opened = SortedRecords(self.path)
+        self.addCleanup(opened.close)
+        return opened
+
+    def test_find_duplicate_keys(self):
+        records = self.open([(1, 10), (5, 50), (5, 51), (5, 52), (9, 90)])
+        self.assertEqual(records.find(5), [50, 51, 52])
+
+    def test_find_at_both_ends(self):
+        records = self.open([(1, 10), (1, 11), (5, 50), (9, 90), (9, 91)])
+        self.assertEqual(records.find(1), [10, 11])
+        self.assertEqual(records.find(9), [90, 91])
+        self.assertEqual(records.find(0), [])
+        self.assertEqual(records.find(10), [])
+        self.assertEqual(records.find(3), [])
+
+    def test_find_in_empty_file(self):
+        self.assertEqual(self.open([]).find(1), [])
+
+
+class CrosswalkIndexTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def make_index(self):
+        index = CrosswalkIndex(self.directory)
+        self.addCleanup(lambda: [records.close() for records in index.records.values()])
+        return index
+
+    def test_add_then_compact_keeps_earlier_records(self):
+        index = self.make_index()
+        index.rebuild([(mal_id_prop, "1", "Q10"), (mal_id_prop, "2", "Q20")])
+        index.add(mal_id_prop, "3", "Q30")
+        index.add(mal_id_prop, "1", "Q11")
+        index.add(md_id_prop, "some-uuid", "Q40")
+        self.assertEqual(index.lookup(mal_id_prop, "1"), ["Q10", "Q11"])
+        index.compact()
+        self.assertEqual(index.overlay_size, 0)
+        self.assertEqual(index.lookup(mal_id_prop, "1"), ["Q10", "Q11"])
+        self.assertEqual(index.lookup(mal_id_prop, "2"), ["Q20"])
+        self.assertEqual(index.lookup(mal_id_prop, "3"), ["Q30"])
+        self.assertEqual(index.lookup(md_id_prop, "some-uuid"), ["Q40"])
+        # And what was compacted is read back from the files.
+        reopened = self.make_index()
+        self.assertEqual(reopened.lookup(mal_id_prop, "1"), ["Q10", "Q11"])
+        self.assertEqual(reopened.lookup(md_id_prop, "some-uuid"), ["Q40"])
+
+    def test_added_ids_survive_a_restart_before_compaction(self):
+        self.make_index().add(mal_id_prop, "7", "Q70")
+        self.assertEqual(self.make_index().lookup(mal_id_prop, "7"), ["Q70"])
+
+    def test_rebuild_removes_files_of_dropped_properties(self):
+        index = self.make_index()
+        index.rebuild([(mal_id_prop, "1", "Q10"), (md_id_prop, "some-uuid", "Q40")])
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f"{md_id_prop}.bin"))
+        )
+        index.rebuild([(mal_id_prop, "1", "Q10")])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, f"{md_id_prop}.bin"))
+        )
+        self.assertEqual(index.lookup(md_id_prop, "some-uuid"), [])
+        self.assertEqual(index.lookup(mal_id_prop, "1"), ["Q10"])
+        self.assertFalse(index.is_stale())
+
+    def test_rebuild_without_entries_keeps_the_index(self):
+        index = self.make_index()
+        index.rebuild([(mal_id_prop, "1", "Q10")])
+        with self.assertRaises(ValueError):
+            index.rebuild([])
+        self.assertEqual(index.lookup(mal_id_prop, "1"), ["Q10"])
+
+
+if __name__ == "__main__":
+    unittest.main()
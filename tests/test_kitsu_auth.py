@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.providers.kitsu_auth import KitsuTokenManager
+
+
+class OAuthStandIn(BaseHTTPRequestHandler):
+    """Stands in for Kitsu's token endpoint, rotating the refresh token on every refresh like Kitsu does."""
+
+    server: "OAuthServer"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.payloads.append(payload)
+        if self.server.malformed:
+            self.send_json(200, {"token_type": "bearer"})
+            return
+        if payload.get("refresh_token") != self.server.refresh_token:
+            self.send_json(401, {"error": "invalid_grant"})
+            return
+        self.server.issued += 1
+        self.server.refresh_token = f"refresh-{self.server.issued}"
+        self.send_json(
+            200,
+            {
+                "access_token": f"access-{self.server.issued}",
+                "refresh_token": self.server.refresh_token,
+                "created_at": int(time.time()),
+                "expires_in": self.server.expires_in,
+            },
+        )
+
+    def send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OAuthServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), OAuthStandIn)
+        self.payloads: list[dict] = []
+        self.refresh_token = "refresh-0"
+        self.issued = 0
+        self.expires_in = 30 * 24 * 60 * 60
+        self.malformed = False
+
+
+class KitsuTokenManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = OAuthServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.token_url = f"http://127.0.0.1:{self.server.server_address[1]}/token"
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        self.state_path = os.path.join(state_dir.name, "kitsu_token.json")
+
+    def make_manager(self, expires_in: float, refresh_token: str = "refresh-0"):
+        manager = KitsuTokenManager(
+            "access-0",
+            refresh_token,
+            time.time() + expires_in,
+            self.token_url,
+            self.state_path,
+        )
+        self.addCleanup(manager.stop)
+        return manager
+
+    def test_refresh_rotates_and_persists_tokens(self):
+        manager = self.make_manager(60 * 24 * 60 * 60)
+        self.assertTrue(manager.refresh())
+        self.assertEqual(
+            self.server.payloads,
+            [{"grant_type": "refresh_token", "refresh_token": "refresh-0"}],
+        )
+        self.assertEqual(manager.headers(), {"Authorization": "Bearer access-1"})
+        # The refresh token that was configured no longer works, the saved one is used instead.
+        restarted = self.make_manager(60)
+        self.assertEqual(restarted.refresh_token, "refresh-1")
+        self.assertEqual(restarted.headers(), {"Authorization": "Bearer access-1"})
+        self.assertTrue(restarted.refresh())
+        self.assertEqual(restarted.headers(), {"Authorization": "Bearer access-2"})
+
+    def test_short_lived_token_is_not_refreshed_in_a_loop(self):
+        self.server.expires_in = 60 * 60
+        manager = self.make_manager(60 * 60)
+        assert manager._timer is not None
+        self.assertGreaterEqual(manager._timer.interval, 29 * 60)
+        self.assertTrue(manager.refresh())
+        assert manager._timer is not None
+        self.assertGreaterEqual(manager._timer.interval, 29 * 60)
+        self.assertEqual(len(self.server.payloads), 1)
+
+    def test_expired_token_waits_the_minimum_delay(self):
+        manager = self.make_manager(-60)
+        assert manager._timer is not None
+        self.assertEqual(manager._timer.interval, manager.min_refresh_delay)
+
+    def test_expired_token_is_refreshed_in_line(self):
+        manager = self.make_manager(-60)
+        self.assertEqual(manager.headers(), {"Authorization": "Bearer access-1"})
+
+    def test_failed_refresh_gives_no_headers(self):
+        manager = self.make_manager(-60, "revoked")
+        self.assertEqual(manager.headers(), {})
+        self.assertFalse(os.path.exists(self.state_path))
+        # Tried again only after the retry delay.
+        self.assertEqual(manager.headers(), {})
+        self.assertEqual(len(self.server.payloads), 1)
+
+    def test_malformed_refresh_gives_no_headers(self):
+        self.server.malformed = True
+        manager = self.make_manager(-60)
+        self.assertFalse(manager.refresh())
+        self.assertEqual(manager.headers(), {})
+        self.assertEqual(manager.refresh_token, "refresh-0")
+        self.assertFalse(os.path.exists(self.state_path))
+
+    def test_headers_are_a_copy(self):
+        manager = self.make_manager(60 * 24 * 60 * 60)
+        manager.headers()["Accept"] = "application/json"
+        self.assertEqual(manager.headers(), {"Authorization": "Bearer access-0"})
+
+
+if __name__ == "__main__":
+    unittest.main()
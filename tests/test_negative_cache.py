@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from src.negative_cache import BloomFilter, NegativeCache
+
+
+class BloomFilterTest(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [f"P1:{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate_within_capacity(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"P1:{i}")
+        false_positives = sum(f"P2:{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+
+class NegativeCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "negative_cache.sqlite3")
+
+    def make_cache(self, ttl=None):
+        cache = NegativeCache(self.path, ttl)
+        self.addCleanup(cache.connection.close)
+        return cache
+
+    def test_added_ids_are_contained_per_namespace(self):
+        cache = self.make_cache()
+        cache.add("P1", "123")
+        self.assertTrue(cache.contains("P1", "123"))
+        self.assertFalse(cache.contains("P2", "123"))
+        self.assertFalse(cache.contains("P1", "124"))
+
+    def test_entries_expire(self):
+        cache = self.make_cache(ttl=60)
+        cache.add("P1", "123")
+        cache.add("P1", "456", ttl=3600)
+        with mock.patch("time.time", return_value=time.time() + 120):
+            self.assertFalse(cache.contains("P1", "123"))
+            self.assertTrue(cache.contains("P1", "456"))
+            # Expired entries are dropped when the cache is opened.
+            reopened = self.make_cache()
+        self.assertFalse(reopened.contains("P1", "123"))
+        self.assertTrue(reopened.contains("P1", "456"))
+
+    def test_entries_survive_growing_the_filter(self):
+        cache = self.make_cache()
+        capacity = cache.filter.capacity
+        for i in range(capacity + 10):
+            cache.add("P1", str(i))
+        self.assertGreater(cache.filter.capacity, capacity)
+        self.assertTrue(all(cache.contains("P1", str(i)) for i in range(capacity + 10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+from src.retry import RetryPolicy, item_budget
+
+
+class NextDelayTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The longest possible delay, so the deadline checks are deterministic.
+        patcher = mock.patch("random.uniform", side_effect=lambda low, high: high)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stops_after_the_attempts(self):
+        state = RetryPolicy(attempts=3, base_delay=1, deadline=None).start()
+        self.assertEqual(state.next_delay(), 1)
+        self.assertEqual(state.next_delay(), 2)
+        self.assertIsNone(state.next_delay())
+
+    def test_delays_are_capped(self):
+        state = RetryPolicy(
+            attempts=10, base_delay=10, max_delay=15, deadline=None
+        ).start()
+        self.assertEqual([state.next_delay() for _ in range(3)], [10, 15, 15])
+
+    def test_stops_before_the_deadline(self):
+        state = RetryPolicy(attempts=10, base_delay=10, deadline=25).start()
+        self.assertEqual(state.next_delay(), 10)
+        self.now += 10
+        # The next attempt would start at 1030, after the deadline at 1025.
+        self.assertIsNone(state.next_delay())
+
+    def test_stops_before_the_item_budget(self):
+        with item_budget(15):
+            state = RetryPolicy(attempts=10, base_delay=10, deadline=None).start()
+            self.assertEqual(state.next_delay(), 10)
+            self.assertIsNone(state.next_delay())
+        # Outside the block there is no budget anymore.
+        state = RetryPolicy(attempts=10, base_delay=10, deadline=None).start()
+        self.assertEqual(state.next_delay(), 10)
+        self.assertEqual(state.next_delay(), 20)
+
+    def test_timeout_fits_the_deadlines(self):
+        policy = RetryPolicy(timeout=30, deadline=100)
+        with item_budget(20):
+            self.assertEqual(policy.start().timeout(), 20)
+        self.assertEqual(policy.start().timeout(), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
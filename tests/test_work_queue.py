@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from src.work_queues import SQLiteWorkQueue
+
+
+class SQLiteWorkQueueTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "work_queue.sqlite3")
+
+    def make_queue(self, **kwargs):
+        queue = SQLiteWorkQueue(self.path, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_failed_item_is_requeued_up_to_max_attempts(self):
+        queue = self.make_queue()
+        queue.put("Q1")
+        for attempt in range(1, queue.max_attempts + 1):
+            work_item = queue.get(timeout=0)
+            assert work_item is not None
+            self.assertEqual((work_item.qid, work_item.attempts), ("Q1", attempt))
+            queue.fail(work_item, "error")
+        self.assertIsNone(queue.get(timeout=0))
+        self.assertEqual(len(queue), 0)
+
+    def test_putting_a_failed_item_again_resets_its_attempts(self):
+        queue = self.make_queue()
+        queue.put("Q1")
+        for _ in range(queue.max_attempts):
+            queue.fail(queue.get(timeout=0), "error")
+        queue.put("Q1")
+        work_item = queue.get(timeout=0)
+        assert work_item is not None
+        self.assertEqual(work_item.attempts, 1)
+
+    def test_item_queued_while_claimed_is_processed_again(self):
+        queue = self.make_queue()
+        queue.put("Q1")
+        work_item = queue.get(timeout=0)
+        queue.put("Q1")
+        self.assertIsNone(queue.get(timeout=0))
+        queue.ack(work_item)
+        work_item = queue.get(timeout=0)
+        assert work_item is not None
+        self.assertEqual((work_item.qid, work_item.attempts), ("Q1", 1))
+        queue.ack(work_item)
+        self.assertIsNone(queue.get(timeout=0))
+
+    def test_higher_priority_first(self):
+        queue = self.make_queue()
+        queue.put("Q1")
+        queue.put("Q2", priority=5)
+        queue.put("Q1", priority=1)
+        self.assertEqual([queue.get(timeout=0).qid for _ in range(2)], ["Q2", "Q1"])
+
+    def test_claimed_items_are_recovered_on_open(self):
+        queue = self.make_queue()
+        queue.put("Q1")
+        queue.get(timeout=0)
+        queue.close()
+        work_item = self.make_queue().get(timeout=0)
+        assert work_item is not None
+        self.assertEqual(work_item.qid, "Q1")
+
+
+if __name__ == "__main__":
+    unittest.main()